@@ -0,0 +1,58 @@
+"""
+Management command to populate the `reviewer_user` of existing reviews from
+their AnonymousUserId `reviewer`.
+
+Reviews are read in id order in fixed-size chunks; every chunk resolves its
+reviewers with one query and is written back with one bulk update.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from edx_solutions_projects.models import WorkgroupPeerReview, WorkgroupReview, WorkgroupSubmissionReview
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+REVIEW_MODELS = (WorkgroupReview, WorkgroupSubmissionReview, WorkgroupPeerReview)
+
+
+def backfill_reviewer_users(model, batch_size=BATCH_SIZE):
+    """
+    Populate `reviewer_user` for the reviews of `model` that don't have one yet.
+
+    :return: the number of updated reviews
+    """
+    reviews = model.objects.filter(reviewer_user__isnull=True).order_by('id').only('id', 'reviewer')
+    updated = 0
+    last_id = 0
+    while True:
+        chunk = list(reviews.filter(id__gt=last_id)[:batch_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        user_ids = model.get_reviewer_user_ids(review.reviewer for review in chunk)
+        resolved = []
+        for review in chunk:
+            review.reviewer_user_id = user_ids.get(review.reviewer)
+            if review.reviewer_user_id is not None:
+                resolved.append(review)
+        model.objects.bulk_update(resolved, ['reviewer_user'])
+        updated += len(resolved)
+        log.info('%s: updated %d reviews', model.__name__, updated)
+    return updated
+
+
+class Command(BaseCommand):
+    """
+    Populates the reviewer user of existing reviews from their AnonymousUserId
+    """
+    help = 'Populates the reviewer user of existing reviews from their AnonymousUserId'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Reviews updated per query')
+
+    def handle(self, *args, **options):
+        for model in REVIEW_MODELS:
+            updated = backfill_reviewer_users(model, options['batch_size'])
+            self.stdout.write('{}: updated {} reviews'.format(model.__name__, updated))
+        self.stdout.write(self.style.SUCCESS('Done.'))
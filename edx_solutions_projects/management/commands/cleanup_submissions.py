@@ -0,0 +1,120 @@
+"""
+Management command to remove workgroup submissions matching a set of filters,
+along with their uploaded files.
+
+Rows are deleted in fixed-size batches and the files of each batch are removed
+from storage with batched deletes, instead of one storage request per row.
+"""
+import logging
+import re
+import time
+from datetime import datetime, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from edx_solutions_projects.models import SubmissionBlob, WorkgroupSubmission
+from edx_solutions_projects.receivers import delete_submission_file
+from edx_solutions_projects.utils import delete_storage_files, skip_signal
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def glob_to_regex(pattern):
+    """
+    Translate a filename glob (`*` and `?` wildcards) to an anchored regex usable by the database.
+    """
+    regex = ''.join(
+        '.*' if char == '*' else '.' if char == '?' else re.escape(char)
+        for char in pattern
+    )
+    return '^{}$'.format(regex)
+
+
+def parse_date(value):
+    """
+    Parse a YYYY-MM-DD command line date into an aware datetime at midnight.
+    """
+    date = datetime.strptime(value, '%Y-%m-%d').date()
+    return timezone.make_aware(datetime.combine(date, dt_time.min))
+
+
+class Command(BaseCommand):
+    """
+    Removes workgroup submissions matching the given filters, along with their files
+    """
+    help = 'Removes workgroup submissions matching the given filters, along with their files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filename', type=str, help='Glob matched against the document filename, e.g. "image*.png"'
+        )
+        parser.add_argument('--mime-type', type=str, help='Document mime type, e.g. "image/png"')
+        parser.add_argument('--course', type=str, action='append', help='Course id, can be repeated')
+        parser.add_argument('--created-after', type=parse_date, help='Only submissions created on or after YYYY-MM-DD')
+        parser.add_argument('--created-before', type=parse_date, help='Only submissions created before YYYY-MM-DD')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Submissions deleted per batch')
+        parser.add_argument('--dry-run', action='store_true', default=False, help='Only report matching submissions')
+        parser.add_argument('--yes', action='store_true', default=False, help='Do not ask for confirmation')
+
+    def get_submissions(self, options):
+        """
+        Build the queryset of submissions matching the command filters.
+        """
+        filters = {}
+        if options.get('filename'):
+            filters['document_filename__regex'] = glob_to_regex(options['filename'])
+        if options.get('mime_type'):
+            filters['document_mime_type'] = options['mime_type']
+        if options.get('course'):
+            filters['workgroup__project__course_id__in'] = options['course']
+        if options.get('created_after'):
+            filters['created__gte'] = options['created_after']
+        if options.get('created_before'):
+            filters['created__lt'] = options['created_before']
+        if not filters:
+            raise CommandError('At least one filter is required')
+        return WorkgroupSubmission.objects.filter(**filters)
+
+    def handle(self, *args, **options):
+        submissions = self.get_submissions(options)
+        total = submissions.count()
+        self.stdout.write('{} matching workgroup submissions'.format(total))
+        if options['dry_run'] or not total:
+            return
+
+        if not options['yes']:
+            choice = input('Are you sure? [yn]').lower()
+            if choice not in ('y', 'yes'):
+                return
+
+        batch_size = options['batch_size']
+        started = time.time()
+        deleted = 0
+        last_id = 0
+        while True:
+            batch = list(
+                submissions.filter(id__gt=last_id).order_by('id').values_list('id', 'storage_key')[:batch_size]
+            )
+            if not batch:
+                break
+            submission_ids = [submission_id for submission_id, __ in batch]
+            # Files are removed below with batched storage deletes instead of one request per row
+            with transaction.atomic():
+                with skip_signal(post_delete, receiver=delete_submission_file, sender=WorkgroupSubmission):
+                    WorkgroupSubmission.objects.filter(id__in=submission_ids).delete()
+                unreferenced_keys = SubmissionBlob.objects.release_many([storage_key for __, storage_key in batch])
+            delete_storage_files(unreferenced_keys)
+
+            deleted += len(batch)
+            last_id = submission_ids[-1]
+            elapsed = time.time() - started
+            self.stdout.write('Deleted {}/{} submissions ({:.1f} submissions/s)'.format(
+                deleted, total, deleted / elapsed if elapsed else deleted
+            ))
+
+        log.info('Deleted %d workgroup submissions', deleted)
+        self.stdout.write(self.style.SUCCESS('Done.'))
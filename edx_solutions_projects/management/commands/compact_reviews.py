@@ -0,0 +1,76 @@
+"""
+Management command to collapse the duplicate review rows left by repeated
+submissions of the same answer, keeping the latest row of every
+(target, reviewer, question, content_id) key.
+
+Duplicate keys are found with one grouped query and the older rows are
+deleted in batches of keys, so the command can run on live tables.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from edx_solutions_projects.models import WorkgroupPeerReview, WorkgroupReview, WorkgroupSubmissionReview
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+REVIEW_MODELS = (WorkgroupReview, WorkgroupSubmissionReview, WorkgroupPeerReview)
+
+
+def compact_reviews(model, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Delete all but the latest review of every duplicated key of `model`.
+
+    :return: the number of deleted, or with `dry_run` deletable, reviews
+    """
+    key_fields = [model._meta.get_field(name).attname for name in model._meta.unique_together[0]]
+    duplicates = model.objects.order_by().values(*key_fields).annotate(
+        latest_id=Max('id'), reviews=Count('id')
+    ).filter(reviews__gt=1)
+
+    if dry_run:
+        return sum(duplicate['reviews'] - 1 for duplicate in duplicates.iterator())
+
+    deleted = 0
+    batch = []
+    for duplicate in duplicates.iterator():
+        batch.append(duplicate)
+        if len(batch) == batch_size:
+            deleted += _delete_older_reviews(model, key_fields, batch)
+            batch = []
+    if batch:
+        deleted += _delete_older_reviews(model, key_fields, batch)
+    return deleted
+
+
+def _delete_older_reviews(model, key_fields, duplicates):
+    keys = reduce(or_, (Q(**{field: duplicate[field] for field in key_fields}) for duplicate in duplicates))
+    with transaction.atomic():
+        deleted, __ = model.objects.filter(keys).exclude(
+            id__in=[duplicate['latest_id'] for duplicate in duplicates]
+        ).delete()
+    log.info('%s: deleted %d duplicate reviews', model.__name__, deleted)
+    return deleted
+
+
+class Command(BaseCommand):
+    """
+    Collapses duplicate reviews to the latest answer
+    """
+    help = 'Collapses duplicate reviews to the latest answer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Duplicated keys deleted per query')
+        parser.add_argument('--dry-run', action='store_true', default=False, help='Only report duplicate reviews')
+
+    def handle(self, *args, **options):
+        for model in REVIEW_MODELS:
+            count = compact_reviews(model, options['batch_size'], options['dry_run'])
+            self.stdout.write('{}: {} {} duplicate reviews'.format(
+                model.__name__, 'found' if options['dry_run'] else 'deleted', count
+            ))
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -1,50 +1,117 @@
+import logging
+import time
+
 from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
 
 from edx_solutions_api_integration.courseware_access import get_course_key
+from edx_solutions_projects.management.course_runner import (add_course_runner_arguments,
+                                                             get_course_ids, run_for_courses)
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CohortMembership
 
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def fix_course(course_id, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Create the group members missing for the cohort memberships of a course.
+
+    The missing `(courseusergroup_id, user_id)` pairs are found with a single
+    anti-join and inserted with batched `bulk_create` calls.
+    """
+    course_key = get_course_key(course_id)
+    if course_key is None:
+        raise Exception("Failed to create course key")
+
+    GroupUserModel = CourseUserGroup.users.through
+    group_members = GroupUserModel.objects.filter(
+        courseusergroup_id=OuterRef('course_user_group_id'),
+        user_id=OuterRef('user_id'),
+    )
+    # Default cohort must exclude e.g default_cohort
+    missing_members = CohortMembership.objects.filter(
+        course_id=course_key,
+        course_user_group__course_id=course_key,
+    ).exclude(
+        course_user_group__name=CourseUserGroup.default_cohort_name
+    ).annotate(
+        is_group_member=Exists(group_members)
+    ).filter(
+        is_group_member=False
+    ).values_list('course_user_group_id', 'user_id')
+
+    if dry_run:
+        return missing_members.count()
+
+    fixed_members = 0
+    batch = []
+    for course_user_group_id, user_id in missing_members.iterator(chunk_size=batch_size):
+        batch.append(GroupUserModel(courseusergroup_id=course_user_group_id, user_id=user_id))
+        if len(batch) >= batch_size:
+            fixed_members += _create_members(GroupUserModel, batch, course_id)
+            batch = []
+    if batch:
+        fixed_members += _create_members(GroupUserModel, batch, course_id)
+    return fixed_members
+
+
+def _create_members(GroupUserModel, members, course_id):
+    GroupUserModel.objects.bulk_create(members, ignore_conflicts=True)
+    log.info('%s: created %d cohort members', course_id, len(members))
+    return len(members)
+
 
 class Command(BaseCommand):
     help = "Cohort fixation of specific courses"
 
     def add_arguments(self, parser):
         parser.add_argument('fix', nargs=1, type=str, help='Fix cohort')
-        parser.add_argument('course', nargs='+', type=str, help='Cohort fixation courses')
+        parser.add_argument('course', nargs='*', type=str, help='Cohort fixation courses')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Only report the number of missing cohort members, without creating them'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Number of cohort members created per query (default {})'.format(BATCH_SIZE)
+        )
+        add_course_runner_arguments(parser)
 
     def handle(self, *args, **options):
+        started = time.time()
         try:
             op = options['fix'][0]
-            courses = options['course']
             if op.lower() != 'fix':
                 raise Exception("Only 'fix' operations supported")
-
-            course_keys = [get_course_key(course_id) for course_id in courses]
-            if None in course_keys:
-                raise Exception("At least one course failed to create course key")
-
-            # Default cohort must exclude e.g default_cohort
-            course_user_groups = CourseUserGroup.objects.filter(
-                course_id__in=course_keys).exclude(
-                name=CourseUserGroup.default_cohort_name
-            ).values_list('id', flat=True)
-            memberships = CohortMembership.objects.filter(
-                course_user_group_id__in=list(course_user_groups),
-                course_id__in=course_keys
-            ).values_list(
-                'user_id',
-                'course_user_group_id'
-            )
-
-            total_fixed_members = 0
-            GroupUserModel = CourseUserGroup.users.through._meta.model
-            for user_id, course_user_group_id in memberships:
-                member, created = GroupUserModel.objects.get_or_create(
-                    courseusergroup_id=course_user_group_id, user_id=user_id
-                )
-                if created:
-                    total_fixed_members += 1
+            course_ids = get_course_ids(options)
         except Exception as e:
             self.stderr.write(self.style.ERROR('Task failed to trigger with exception: "%s"' % str(e)))
+            return
+
+        dry_run = options['dry_run']
+        total_fixed_members = 0
+        failed_courses = []
+        results = run_for_courses(
+            fix_course, course_ids, options['processes'], batch_size=options['batch_size'], dry_run=dry_run
+        )
+        for course_id, fixed_members, error in results:
+            if error is not None:
+                failed_courses.append(course_id)
+                self.stderr.write(self.style.ERROR('{}: failed with exception "{}"'.format(course_id, error)))
+                continue
+            total_fixed_members += fixed_members
+            self.stdout.write('{}: {} {} cohort members'.format(
+                course_id, 'missing' if dry_run else 'fixed', fixed_members
+            ))
+
+        if dry_run:
+            message = 'Dry run finished in {:.2f}s, total missing cohort members {}'
         else:
-            self.stdout.write(self.style.SUCCESS('Successfully triggered cohort fixation task, '
-                                                 'total fixed cohort members {}'.format(total_fixed_members)))
+            message = 'Successfully triggered cohort fixation task in {:.2f}s, total fixed cohort members {}'
+        self.stdout.write(self.style.SUCCESS(message.format(time.time() - started, total_fixed_members)))
+        if failed_courses:
+            self.stderr.write(self.style.ERROR('{} of {} courses failed: {}'.format(
+                len(failed_courses), len(course_ids), ', '.join(failed_courses)
+            )))
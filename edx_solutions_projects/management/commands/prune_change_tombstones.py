@@ -0,0 +1,54 @@
+"""
+Management command to delete the change feed tombstones older than the
+retention period, in batches so that it can run on a live table.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from edx_solutions_projects.models import ChangeTombstone
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def prune_change_tombstones(before, batch_size=BATCH_SIZE):
+    """
+    Delete the tombstones of the deletes made before `before`.
+
+    :return: the number of deleted tombstones
+    """
+    deleted = 0
+    while True:
+        tombstone_ids = list(
+            ChangeTombstone.objects.filter(deleted__lt=before).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not tombstone_ids:
+            break
+        deleted += ChangeTombstone.objects.filter(id__in=tombstone_ids).delete()[0]
+    log.info('Deleted %d change tombstones', deleted)
+    return deleted
+
+
+class Command(BaseCommand):
+    """
+    Deletes the change feed tombstones older than the retention period
+    """
+    help = 'Deletes the change feed tombstones older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Retention in days, defaults to PROJECTS_CHANGE_TOMBSTONE_RETENTION_DAYS'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Tombstones deleted per batch')
+
+    def handle(self, *args, **options):
+        if options['days'] is None:
+            before = ChangeTombstone.objects.get_retention_horizon()
+        else:
+            before = timezone.now() - timedelta(days=options['days'])
+        deleted = prune_change_tombstones(before, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Deleted {} change tombstones'.format(deleted)))
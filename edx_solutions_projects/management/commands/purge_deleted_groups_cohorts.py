@@ -1,38 +1,100 @@
+import logging
+
 from django.core.management.base import BaseCommand
 from edx_solutions_api_integration.courseware_access import get_course_key
-from edx_solutions_projects.models import Workgroup
+from edx_solutions_projects.management.course_runner import (add_course_runner_arguments,
+                                                             get_course_ids, run_for_courses)
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def purge_course(course_id, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Delete the cohorts of a course that are no longer linked to a workgroup.
+
+    The obsolete cohorts are found with an anti-join on the workgroup cohort
+    foreign key and deleted in batches of `batch_size`.
+    """
+    course_key = get_course_key(course_id)
+    if course_key is None:
+        raise Exception("Failed to create course key")
+
+    # Default cohort must exclude e.g default_cohort; cohorts still linked to a workgroup are kept
+    obsoleted_cohorts = CourseUserGroup.objects.filter(
+        course_id=course_key,
+        group_type=CourseUserGroup.COHORT,
+        workgroups__isnull=True,
+    ).exclude(name=CourseUserGroup.default_cohort_name).order_by('id').values_list('id', flat=True)
+
+    if dry_run:
+        return obsoleted_cohorts.count()
+
+    deleted_cohorts = 0
+    last_id = 0
+    while True:
+        cohort_ids = list(obsoleted_cohorts.filter(id__gt=last_id)[:batch_size])
+        if not cohort_ids:
+            break
+        CourseUserGroup.objects.filter(id__in=cohort_ids).delete()
+        deleted_cohorts += len(cohort_ids)
+        last_id = cohort_ids[-1]
+        log.info('%s: deleted %d obsolete cohorts', course_id, deleted_cohorts)
+    return deleted_cohorts
+
 
 class Command(BaseCommand):
     help = "Cohort deletion of course deleted groups"
 
     def add_arguments(self, parser):
         parser.add_argument('remove', nargs=1, type=str, help='Remove cohort')
-        parser.add_argument('course', nargs='+', type=str, help='Cohort deletion course')
+        parser.add_argument('course', nargs='*', type=str, help='Cohort deletion course')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Only report the number of obsolete cohorts, without deleting them'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Number of cohorts deleted per query (default {})'.format(BATCH_SIZE)
+        )
+        add_course_runner_arguments(parser)
 
     def handle(self, *args, **options):
         try:
             op = options['remove'][0]
-            courses = options['course']
             if op.lower() != 'remove':
                 raise Exception("Only 'remove' operations supported")
-
-            course_keys = [get_course_key(course_id) for course_id in courses]
-            if None in course_keys:
-                raise Exception("At least one course failed to create course key")
-
-            # Default cohort must exclude e.g default_cohort
-            exclude_cohorts = [CourseUserGroup.default_cohort_name]
-            workgroups = Workgroup.objects.filter(project__course_id__in=courses)
-            for work_group in workgroups:
-                exclude_cohorts.append(work_group.cohort_name)
-            obsoleted_cohorts = CourseUserGroup.objects.filter(
-                course_id__in=course_keys,
-                group_type=CourseUserGroup.COHORT
-            ).exclude(name__in=exclude_cohorts)
-            obsoleted_cohorts.delete()
+            course_ids = get_course_ids(options)
         except Exception as e:
             self.stderr.write(self.style.ERROR('Task failed to trigger with exception: "%s"' % str(e)))
+            return
+
+        dry_run = options['dry_run']
+        total_cohorts = 0
+        failed_courses = []
+        results = run_for_courses(
+            purge_course, course_ids, options['processes'], batch_size=options['batch_size'], dry_run=dry_run
+        )
+        for course_id, cohorts, error in results:
+            if error is not None:
+                failed_courses.append(course_id)
+                self.stderr.write(self.style.ERROR('{}: failed with exception "{}"'.format(course_id, error)))
+            else:
+                total_cohorts += cohorts
+                self.stdout.write('{}: {} {} obsolete cohorts'.format(
+                    course_id, 'found' if dry_run else 'deleted', cohorts
+                ))
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS('Dry run finished, total obsolete cohorts {}'.format(total_cohorts)))
         else:
-            self.stdout.write(self.style.SUCCESS('Successfully triggered Cohort deletion for course deleted groups'))
+            self.stdout.write(self.style.SUCCESS(
+                'Successfully triggered Cohort deletion for course deleted groups, '
+                'total deleted cohorts {}'.format(total_cohorts)
+            ))
+        if failed_courses:
+            self.stderr.write(self.style.ERROR('{} of {} courses failed: {}'.format(
+                len(failed_courses), len(course_ids), ', '.join(failed_courses)
+            )))
@@ -0,0 +1,76 @@
+"""
+Management command to find, and optionally delete, files under `group_work/`
+in the default storage that no workgroup submission references anymore.
+
+The storage is listed page by page and the paths of every page are looked up
+among the submission storage keys with one query, so memory use stays bounded
+by the page size whatever the number of stored objects. Lookups are exact
+matches, so they don't depend on the ordering of the database collation.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from edx_solutions_projects.models import WorkgroupSubmission
+from edx_solutions_projects.utils import delete_storage_files, iter_storage_pages
+
+log = logging.getLogger(__name__)
+
+PREFIX = 'group_work/'
+PAGE_SIZE = 1000
+MIN_AGE_HOURS = 24
+
+
+def find_orphans(storage_paths, referenced_paths):
+    """
+    Return, in order, the storage paths that are not referenced.
+    """
+    referenced = set(referenced_paths)
+    return [path for path in storage_paths if path not in referenced]
+
+
+def get_referenced_paths(storage_paths):
+    """
+    Return the submission storage keys among `storage_paths`.
+    """
+    if not storage_paths:
+        return []
+    return WorkgroupSubmission.objects.filter(
+        storage_key__in=storage_paths,
+    ).values_list('storage_key', flat=True)
+
+
+class Command(BaseCommand):
+    """
+    Reports or deletes submission files that are not referenced by any workgroup submission
+    """
+    help = 'Reports or deletes submission files that are not referenced by any workgroup submission'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', type=str, default=PREFIX, help='Storage prefix to scan')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Files listed per storage request')
+        parser.add_argument(
+            '--min-age-hours', type=int, default=MIN_AGE_HOURS,
+            help='Skip files modified more recently, as their submission may not be created yet'
+        )
+        parser.add_argument('--delete', action='store_true', default=False, help='Delete the orphaned files')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        scanned = 0
+        total_orphans = 0
+        for page in iter_storage_pages(options['prefix'], options['page_size']):
+            scanned += len(page)
+            storage_paths = sorted(path for path, modified in page if modified <= cutoff)
+            orphans = find_orphans(storage_paths, get_referenced_paths(storage_paths))
+            for orphan in orphans:
+                self.stdout.write(orphan)
+            if orphans and options['delete']:
+                delete_storage_files(orphans)
+            total_orphans += len(orphans)
+            log.info('Scanned %d files, found %d orphans', scanned, total_orphans)
+
+        self.stdout.write(self.style.SUCCESS('Scanned {} files, {} {} orphaned files'.format(
+            scanned, 'deleted' if options['delete'] else 'found', total_orphans
+        )))
@@ -5,8 +5,8 @@ upload the image component of anything copied into the clipboard.
 """
 import logging
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from edx_solutions_projects.models import WorkgroupSubmission
 
 log = logging.getLogger(__name__)
 
@@ -18,13 +18,20 @@ class Command(BaseCommand):
     """
     help = 'Removes spurious workgroup submissions containing "image.png"'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--yes', action='store_true', default=False, help='Do not ask for confirmation')
+        parser.add_argument('--dry-run', action='store_true', default=False, help='Only report matching submissions')
+
     def handle(self, *args, **options):
         log.info('Deleting workgroup submissions containing a document called "image.png"')
 
-        choice = input('Are you sure? [yn]').lower()
-        if choice == 'y' or choice == 'yes':
-            WorkgroupSubmission.objects.filter(
-                document_filename='image.png',
-            ).delete()
+        call_command(
+            'cleanup_submissions',
+            filename='image.png',
+            yes=options['yes'],
+            dry_run=options['dry_run'],
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
 
-            log.info('Done.')
+        log.info('Done.')
@@ -0,0 +1,44 @@
+"""
+Tests for the backfill_reviewer_users management command
+"""
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from edx_solutions_projects.models import Project, Workgroup, WorkgroupPeerReview, WorkgroupReview
+from student.models import anonymous_id_for_user
+
+
+class BackfillReviewerUsersTests(TestCase):
+    """ Test suite for the backfill_reviewer_users command """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='test@edx.org', username='testing')
+        self.reviewer = anonymous_id_for_user(self.user, None)
+        project = Project.objects.create(course_id='edx/demo/course', content_id='i4x://blah')
+        self.workgroup = Workgroup.objects.create(name='Test Workgroup', project=project)
+
+    def test_reviewer_user_set_on_save(self):
+        review = WorkgroupReview.objects.create(
+            workgroup=self.workgroup, reviewer=self.reviewer, question='Q', answer='A'
+        )
+        self.assertEqual(review.reviewer_user_id, self.user.id)
+
+    def test_backfill(self):
+        reviews = [
+            WorkgroupPeerReview.objects.create(
+                workgroup=self.workgroup, user=self.user, reviewer=reviewer, question='Q', answer='A'
+            )
+            for reviewer in (self.reviewer, self.reviewer, 'unknown')
+        ]
+        WorkgroupPeerReview.objects.update(reviewer_user=None)
+
+        out = StringIO()
+        call_command('backfill_reviewer_users', batch_size=1, stdout=out)
+        self.assertIn('WorkgroupPeerReview: updated 2 reviews', out.getvalue())
+        self.assertEqual(
+            [WorkgroupPeerReview.objects.get(id=review.id).reviewer_user_id for review in reviews],
+            [self.user.id, self.user.id, None]
+        )
@@ -0,0 +1,65 @@
+"""
+Tests for the cleanup_submissions management command
+"""
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from edx_solutions_projects.models import Project, Workgroup, WorkgroupSubmission
+from mock import patch
+
+
+@patch('edx_solutions_projects.management.commands.cleanup_submissions.delete_storage_files')
+class CleanupSubmissionsTests(TestCase):
+    """ Test suite for the cleanup_submissions command """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='test@edx.org', username='testing')
+        self.project = Project.objects.create(course_id='edx/demo/course', content_id='i4x://blah')
+        self.workgroup = Workgroup.objects.create(name='Test Workgroup', project=self.project)
+
+        self.submissions = {}
+        documents = (('image.png', 'image/png'), ('image2.png', 'image/png'), ('report.pdf', 'application/pdf'))
+        for filename, mime_type in documents:
+            self.submissions[filename] = WorkgroupSubmission.objects.create(
+                workgroup=self.workgroup,
+                user=self.user,
+                document_id=filename,
+                document_url='/media/group_work/{}/{}/{}'.format(self.workgroup.id, 'a' * 40, filename),
+                document_mime_type=mime_type,
+                document_filename=filename,
+            )
+
+    def test_filters_required(self, mock_delete_files):
+        with self.assertRaises(CommandError):
+            call_command('cleanup_submissions', yes=True)
+
+    def test_dry_run(self, mock_delete_files):
+        out = StringIO()
+        call_command('cleanup_submissions', filename='image*.png', dry_run=True, stdout=out)
+        self.assertIn('2 matching workgroup submissions', out.getvalue())
+        self.assertEqual(WorkgroupSubmission.objects.count(), 3)
+        self.assertFalse(mock_delete_files.called)
+
+    def test_delete_in_batches(self, mock_delete_files):
+        out = StringIO()
+        call_command(
+            'cleanup_submissions', filename='image*.png', mime_type='image/png', batch_size=1, yes=True, stdout=out
+        )
+        self.assertIn('Deleted 2/2 submissions', out.getvalue())
+        self.assertEqual(list(WorkgroupSubmission.objects.values_list('document_filename', flat=True)), ['report.pdf'])
+        self.assertEqual(mock_delete_files.call_count, 2)
+        deleted_paths = [path for call in mock_delete_files.call_args_list for path in call[0][0]]
+        self.assertEqual(deleted_paths, [
+            self.submissions['image.png'].document_path,
+            self.submissions['image2.png'].document_path,
+        ])
+
+    def test_course_filter(self, mock_delete_files):
+        call_command('cleanup_submissions', course=['foo/bar/baz'], yes=True, stdout=StringIO())
+        self.assertEqual(WorkgroupSubmission.objects.count(), 3)
+        call_command('cleanup_submissions', course=[self.project.course_id], yes=True, stdout=StringIO())
+        self.assertEqual(WorkgroupSubmission.objects.count(), 0)
@@ -0,0 +1,43 @@
+"""
+Tests for the compact_reviews management command
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from edx_solutions_projects.management.commands.compact_reviews import compact_reviews
+from edx_solutions_projects.models import Project, Workgroup, WorkgroupReview
+
+
+class CompactReviewsTests(TestCase):
+    """ Test suite for the compact_reviews command """
+
+    def setUp(self):
+        super().setUp()
+        project = Project.objects.create(course_id='edx/demo/course', content_id='i4x://blah')
+        self.workgroup = Workgroup.objects.create(name='Test Workgroup', project=project)
+
+    def _create_reviews(self, answers, question='Q'):
+        # Reviews without content_id are not covered by the unique constraint
+        return [
+            WorkgroupReview.objects.create(
+                workgroup=self.workgroup, reviewer='reviewer', question=question, answer=answer
+            )
+            for answer in answers
+        ]
+
+    def test_dry_run(self):
+        self._create_reviews(['first', 'second', 'third'])
+        self.assertEqual(compact_reviews(WorkgroupReview, dry_run=True), 2)
+        self.assertEqual(WorkgroupReview.objects.count(), 3)
+
+    def test_keeps_latest_review(self):
+        self._create_reviews(['first', 'second', 'third'])
+        self._create_reviews(['other'], question='Other')
+
+        out = StringIO()
+        call_command('compact_reviews', batch_size=1, stdout=out)
+        self.assertIn('WorkgroupReview: deleted 2 duplicate reviews', out.getvalue())
+        self.assertEqual(
+            sorted(WorkgroupReview.objects.values_list('answer', flat=True)), ['other', 'third']
+        )
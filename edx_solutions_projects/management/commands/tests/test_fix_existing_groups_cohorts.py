@@ -0,0 +1,90 @@
+"""
+Tests for the fix_existing_groups_cohorts management command
+"""
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from mock import MagicMock, patch
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.course_groups.models import CohortMembership, CourseUserGroup
+
+
+class FixExistingGroupsCohortsTests(TestCase):
+    """ Test suite for the fix_existing_groups_cohorts command """
+
+    def setUp(self):
+        super().setUp()
+        self.course_id = 'course-v1:edX+Demo+2020'
+        self.course_key = CourseKey.from_string(self.course_id)
+        self.cohort = CourseUserGroup.objects.create(
+            name='Group Project 1 Workgroup 1 (Group 1)',
+            course_id=self.course_key,
+            group_type=CourseUserGroup.COHORT,
+        )
+        self.users = [
+            User.objects.create(email='user{}@edx.org'.format(i), username='user{}'.format(i)) for i in range(3)
+        ]
+        for user in self.users:
+            CohortMembership.objects.create(course_user_group=self.cohort, user=user, course_id=self.course_key)
+
+        # Simulate the group members lost for the first two memberships
+        self.GroupUserModel = CourseUserGroup.users.through
+        self.GroupUserModel.objects.filter(
+            courseusergroup_id=self.cohort.id, user_id__in=[self.users[0].id, self.users[1].id]
+        ).delete()
+
+    def test_fix_missing_members(self):
+        out = StringIO()
+        call_command('fix_existing_groups_cohorts', 'fix', self.course_id, batch_size=1, stdout=out)
+        self.assertIn('total fixed cohort members 2', out.getvalue())
+        self.assertEqual(self.GroupUserModel.objects.filter(courseusergroup_id=self.cohort.id).count(), 3)
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('fix_existing_groups_cohorts', 'fix', self.course_id, dry_run=True, stdout=out)
+        self.assertIn('total missing cohort members 2', out.getvalue())
+        self.assertEqual(self.GroupUserModel.objects.filter(courseusergroup_id=self.cohort.id).count(), 1)
+
+    def test_failed_course_does_not_stop_run(self):
+        out, err = StringIO(), StringIO()
+        call_command('fix_existing_groups_cohorts', 'fix', 'not a course', self.course_id, stdout=out, stderr=err)
+        self.assertIn('not a course: failed with exception', err.getvalue())
+        self.assertIn('1 of 2 courses failed', err.getvalue())
+        self.assertIn('total fixed cohort members 2', out.getvalue())
+
+    def test_courses_file_and_all_courses(self):
+        with NamedTemporaryFile('w', suffix='.txt') as courses_file:
+            courses_file.write('{}\n'.format(self.course_id))
+            courses_file.flush()
+            out = StringIO()
+            call_command('fix_existing_groups_cohorts', 'fix', courses_file=courses_file.name, dry_run=True, stdout=out)
+            self.assertIn('{}: missing 2 cohort members'.format(self.course_id), out.getvalue())
+
+        out = StringIO()
+        call_command('fix_existing_groups_cohorts', 'fix', all_courses=True, stdout=out)
+        self.assertIn('{}: fixed 2 cohort members'.format(self.course_id), out.getvalue())
+
+    def test_worker_processes(self):
+        """ Tests that a run on a pool of workers reports the same course results and errors as a serial run """
+        def run(processes):
+            out, err = StringIO(), StringIO()
+            call_command(
+                'fix_existing_groups_cohorts', 'fix', 'not a course', self.course_id,
+                processes=processes, dry_run=True, stdout=out, stderr=err,
+            )
+            return sorted(out.getvalue().splitlines()), sorted(err.getvalue().splitlines())
+
+        pool = MagicMock()
+        # A synchronous pool that completes the courses out of order, like imap_unordered may
+        pool.__enter__.return_value.imap_unordered.side_effect = lambda func, tasks: list(map(func, tasks))[::-1]
+        with patch('edx_solutions_projects.management.course_runner.multiprocessing.get_context') as get_context, \
+                patch('edx_solutions_projects.management.course_runner._close_connections'):
+            get_context.return_value.Pool.return_value = pool
+            parallel = run(processes=2)
+        get_context.return_value.Pool.assert_called_once()
+        self.assertEqual(get_context.return_value.Pool.call_args[1]['processes'], 2)
+        self.assertEqual(parallel, run(processes=1))
+        self.assertIn('1 of 2 courses failed: not a course', '\n'.join(parallel[1]))
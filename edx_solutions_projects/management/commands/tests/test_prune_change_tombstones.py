@@ -0,0 +1,37 @@
+"""
+Tests for the prune_change_tombstones management command
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from edx_solutions_projects.models import ChangeTombstone
+
+
+class PruneChangeTombstonesTests(TestCase):
+    """ Test suite for the prune_change_tombstones command """
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for object_id, age in enumerate((1, 10, 100, 200)):
+            ChangeTombstone.objects.create(
+                object_type='submission', object_id=object_id, project_id=1, deleted=now - timedelta(days=age)
+            )
+
+    def _remaining_ids(self):
+        return sorted(ChangeTombstone.objects.values_list('object_id', flat=True))
+
+    @override_settings(PROJECTS_CHANGE_TOMBSTONE_RETENTION_DAYS=50)
+    def test_default_retention(self):
+        out = StringIO()
+        call_command('prune_change_tombstones', batch_size=1, stdout=out)
+        self.assertIn('Deleted 2 change tombstones', out.getvalue())
+        self.assertEqual(self._remaining_ids(), [0, 1])
+
+    def test_days(self):
+        call_command('prune_change_tombstones', days=5, stdout=StringIO())
+        self.assertEqual(self._remaining_ids(), [0])
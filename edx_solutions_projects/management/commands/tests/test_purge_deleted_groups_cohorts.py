@@ -0,0 +1,73 @@
+"""
+Tests for the purge_deleted_groups_cohorts management command
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from edx_solutions_projects.models import Project, Workgroup
+from mock import MagicMock, patch
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup
+
+
+class PurgeDeletedGroupsCohortsTests(TestCase):
+    """ Test suite for the purge_deleted_groups_cohorts command """
+
+    def setUp(self):
+        super().setUp()
+        self.course_id = 'course-v1:edX+Demo+2020'
+        course_key = CourseKey.from_string(self.course_id)
+        project = Project.objects.create(course_id=self.course_id, content_id='i4x://blah')
+
+        self.workgroup_cohort = CourseUserGroup.objects.create(
+            name='Group Project 1 Workgroup 1 (Group 1)', course_id=course_key, group_type=CourseUserGroup.COHORT
+        )
+        Workgroup.objects.create(name='Group 1', project=project, cohort=self.workgroup_cohort)
+        self.default_cohort = CourseUserGroup.objects.create(
+            name=CourseUserGroup.default_cohort_name, course_id=course_key, group_type=CourseUserGroup.COHORT
+        )
+        self.obsolete_cohort_ids = [
+            CourseUserGroup.objects.create(
+                name='Group Project 1 Workgroup {} (Deleted)'.format(index),
+                course_id=course_key,
+                group_type=CourseUserGroup.COHORT,
+            ).id
+            for index in range(2, 5)
+        ]
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('purge_deleted_groups_cohorts', 'remove', self.course_id, dry_run=True, stdout=out)
+        self.assertIn('total obsolete cohorts 3', out.getvalue())
+        self.assertEqual(CourseUserGroup.objects.filter(id__in=self.obsolete_cohort_ids).count(), 3)
+
+    def test_remove_in_batches(self):
+        out = StringIO()
+        call_command('purge_deleted_groups_cohorts', 'remove', self.course_id, batch_size=2, stdout=out)
+        self.assertIn('total deleted cohorts 3', out.getvalue())
+        self.assertFalse(CourseUserGroup.objects.filter(id__in=self.obsolete_cohort_ids).exists())
+        self.assertTrue(CourseUserGroup.objects.filter(id=self.workgroup_cohort.id).exists())
+        self.assertTrue(CourseUserGroup.objects.filter(id=self.default_cohort.id).exists())
+
+    def test_worker_processes(self):
+        """ Tests that a run on a pool of workers reports the same course results and errors as a serial run """
+        def run(processes):
+            out, err = StringIO(), StringIO()
+            call_command(
+                'purge_deleted_groups_cohorts', 'remove', 'not a course', self.course_id,
+                processes=processes, dry_run=True, stdout=out, stderr=err,
+            )
+            return sorted(out.getvalue().splitlines()), sorted(err.getvalue().splitlines())
+
+        pool = MagicMock()
+        # A synchronous pool that completes the courses out of order, like imap_unordered may
+        pool.__enter__.return_value.imap_unordered.side_effect = lambda func, tasks: list(map(func, tasks))[::-1]
+        with patch('edx_solutions_projects.management.course_runner.multiprocessing.get_context') as get_context, \
+                patch('edx_solutions_projects.management.course_runner._close_connections'):
+            get_context.return_value.Pool.return_value = pool
+            parallel = run(processes=2)
+        get_context.return_value.Pool.assert_called_once()
+        self.assertEqual(get_context.return_value.Pool.call_args[1]['processes'], 2)
+        self.assertEqual(parallel, run(processes=1))
+        self.assertIn('1 of 2 courses failed: not a course', '\n'.join(parallel[1]))
@@ -0,0 +1,82 @@
+"""
+Tests for the reconcile_submission_files management command
+"""
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from edx_solutions_projects.management.commands.reconcile_submission_files import find_orphans
+from edx_solutions_projects.models import Project, Workgroup, WorkgroupSubmission
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT,
+    MEDIA_URL='/media/',
+)
+class ReconcileSubmissionFilesTests(TestCase):
+    """ Test suite for the reconcile_submission_files command """
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create(email='test@edx.org', username='testing')
+        project = Project.objects.create(course_id='edx/demo/course', content_id='i4x://blah')
+        workgroup = Workgroup.objects.create(name='Test Workgroup', project=project)
+
+        self.referenced_path = 'group_work/{}/{}/report.pdf'.format(workgroup.id, 'a' * 40)
+        self.orphan_paths = [
+            'group_work/{}/{}/draft.pdf'.format(workgroup.id, 'b' * 40),
+            'group_work/{}/{}/report.pdf'.format(workgroup.id + 1000, 'a' * 40),
+        ]
+        for path in [self.referenced_path] + self.orphan_paths:
+            default_storage.save(path, ContentFile(b'content'))
+        WorkgroupSubmission.objects.create(
+            workgroup=workgroup,
+            user=user,
+            document_id='report.pdf',
+            document_url='/media/{}'.format(self.referenced_path),
+            document_mime_type='application/pdf',
+            document_filename='report.pdf',
+        )
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDown()
+
+    def test_find_orphans(self):
+        self.assertEqual(find_orphans(['a', 'b', 'c', 'd'], ['b', 'd', 'e']), ['a', 'c'])
+        self.assertEqual(find_orphans(['a', 'b'], []), ['a', 'b'])
+        # Referenced paths don't need to be in the storage order
+        self.assertEqual(find_orphans(['B', 'a', 'c'], ['c', 'B']), ['a'])
+
+    def test_report_orphans(self):
+        out = StringIO()
+        call_command('reconcile_submission_files', page_size=1, min_age_hours=0, stdout=out)
+        for path in self.orphan_paths:
+            self.assertIn(path, out.getvalue())
+        self.assertNotIn(self.referenced_path, out.getvalue())
+        self.assertIn('Scanned 3 files, found 2 orphaned files', out.getvalue())
+        self.assertTrue(all(default_storage.exists(path) for path in self.orphan_paths))
+
+    def test_delete_orphans(self):
+        call_command('reconcile_submission_files', min_age_hours=0, delete=True, stdout=StringIO())
+        self.assertTrue(default_storage.exists(self.referenced_path))
+        self.assertFalse(any(default_storage.exists(path) for path in self.orphan_paths))
+
+    def test_recent_files_skipped(self):
+        out = StringIO()
+        call_command('reconcile_submission_files', stdout=out)
+        self.assertIn('found 0 orphaned files', out.getvalue())
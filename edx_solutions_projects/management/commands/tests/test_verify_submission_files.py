@@ -0,0 +1,85 @@
+"""
+Tests for the verify_submission_files management command
+"""
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from edx_solutions_projects.models import Project, SubmissionBlob, Workgroup, WorkgroupSubmission
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT,
+    MEDIA_URL='/media/',
+)
+class VerifySubmissionFilesTests(TestCase):
+    """ Test suite for the verify_submission_files command """
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='test@edx.org', username='testing')
+        project = Project.objects.create(course_id='edx/demo/course', content_id='i4x://blah')
+        self.workgroups = [
+            Workgroup.objects.create(name='Workgroup {}'.format(index), project=project) for index in range(3)
+        ]
+        self.sha1 = hashlib.sha1(b'content').hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDown()
+
+    def _submit(self, workgroup, sha1, content):
+        storage_key = 'group_work/{}/{}/report.pdf'.format(workgroup.id, sha1)
+        if not default_storage.exists(storage_key):
+            default_storage.save(storage_key, ContentFile(content))
+        return WorkgroupSubmission.objects.create(
+            workgroup=workgroup,
+            user=self.user,
+            document_id='report.pdf',
+            document_url='/media/{}'.format(storage_key),
+            document_mime_type='application/pdf',
+            document_filename='report.pdf',
+        )
+
+    def test_verify_and_share(self):
+        first = self._submit(self.workgroups[0], self.sha1, b'content')
+        second = self._submit(self.workgroups[1], self.sha1, b'content')
+        forged = self._submit(self.workgroups[2], self.sha1, b'other content')
+        # Unverified uploads are not shared
+        self.assertFalse(SubmissionBlob.objects.exists())
+
+        out = StringIO()
+        call_command('verify_submission_files', batch_size=1, stdout=out)
+        self.assertIn('{}: content does not match its key'.format(forged.storage_key), out.getvalue())
+        self.assertIn('Verified 2 files, 1 mismatched, 1 duplicates deleted', out.getvalue())
+
+        blob = SubmissionBlob.objects.get(sha1=self.sha1)
+        self.assertIn(blob.storage_key, [first.storage_key, second.storage_key])
+        self.assertEqual(blob.refcount, 2)
+        for submission in (first, second):
+            self.assertEqual(WorkgroupSubmission.objects.get(id=submission.id).storage_key, blob.storage_key)
+            self.assertEqual(default_storage.exists(submission.storage_key), submission.storage_key == blob.storage_key)
+        self.assertEqual(WorkgroupSubmission.objects.get(id=forged.id).storage_key, forged.storage_key)
+        self.assertTrue(default_storage.exists(forged.storage_key))
+
+    def test_dry_run(self):
+        self._submit(self.workgroups[0], self.sha1, b'content')
+        out = StringIO()
+        call_command('verify_submission_files', dry_run=True, stdout=out)
+        self.assertIn('Verified 1 files, 0 mismatched, 0 duplicates deleted', out.getvalue())
+        self.assertFalse(SubmissionBlob.objects.exists())
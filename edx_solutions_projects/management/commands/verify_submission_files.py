@@ -0,0 +1,72 @@
+"""
+Management command to verify the submission files uploaded straight to the storage
+and share them with the submissions of the same content.
+
+Clients name the keys of their uploads, `group_work/<workgroup>/<sha1>/<filename>`,
+so a file that the server didn't receive itself is kept unshared until its content
+is checked against the SHA-1 of its key. Meant to run periodically: the files are
+downloaded and hashed here, out of any request and database transaction, and only
+the reference counting runs in a transaction.
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from edx_solutions_projects.models import SUBMISSIONS_STORAGE_PREFIX, SubmissionBlob, WorkgroupSubmission
+from edx_solutions_projects.utils import delete_storage_files, get_storage_file_sha1
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def get_unverified_keys(after='', batch_size=BATCH_SIZE):
+    """
+    Return, in order, the next `batch_size` content addressed submission storage keys after
+    `after` that are not registered as blobs yet.
+    """
+    return list(WorkgroupSubmission.objects.filter(
+        storage_key__startswith=SUBMISSIONS_STORAGE_PREFIX,
+        storage_key__gt=after,
+    ).exclude(
+        storage_key__in=SubmissionBlob.objects.values('storage_key'),
+    ).order_by('storage_key').values_list('storage_key', flat=True).distinct()[:batch_size])
+
+
+class Command(BaseCommand):
+    """
+    Verifies the content of the submission files uploaded straight to the storage and shares them
+    """
+    help = 'Verifies the content of the submission files uploaded straight to the storage and shares them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Storage keys looked up per query')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Only report the files whose content does not match their key'
+        )
+
+    def handle(self, *args, **options):
+        verified = 0
+        mismatched = 0
+        duplicates = []
+        storage_keys = get_unverified_keys(batch_size=options['batch_size'])
+        while storage_keys:
+            for storage_key in storage_keys:
+                sha1 = SubmissionBlob.sha1_for_storage_key(storage_key)
+                if sha1 is None:
+                    continue
+                if get_storage_file_sha1(storage_key) != sha1:
+                    mismatched += 1
+                    self.stdout.write('{}: content does not match its key'.format(storage_key))
+                    continue
+                verified += 1
+                if not options['dry_run'] and SubmissionBlob.objects.share_verified(storage_key):
+                    duplicates.append(storage_key)
+            log.info('Verified %d files, %d mismatched', verified, mismatched)
+            storage_keys = get_unverified_keys(storage_keys[-1], options['batch_size'])
+
+        if duplicates:
+            delete_storage_files(duplicates)
+        self.stdout.write(self.style.SUCCESS('Verified {} files, {} mismatched, {} duplicates deleted'.format(
+            verified, mismatched, len(duplicates)
+        )))
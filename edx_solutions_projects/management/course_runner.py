@@ -0,0 +1,88 @@
+"""
+Helpers to run a management command over many courses, optionally spread
+across a pool of worker processes.
+"""
+import multiprocessing
+
+from django.core.management.base import CommandError
+from django.db import connections
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup
+
+
+def add_course_runner_arguments(parser):
+    """
+    Register the arguments used to select courses and the number of worker processes.
+    """
+    parser.add_argument(
+        '--all-courses', action='store_true', default=False,
+        help='Process every course that has cohorts'
+    )
+    parser.add_argument(
+        '--courses-file', type=str, default=None,
+        help='Path to a file listing one course id per line'
+    )
+    parser.add_argument(
+        '--processes', type=int, default=1,
+        help='Number of worker processes used to process courses in parallel (default 1)'
+    )
+
+
+def get_course_ids(options):
+    """
+    Collect the course ids to process from the positional arguments, `--courses-file` and `--all-courses`.
+    """
+    course_ids = list(options.get('course') or [])
+    if options.get('courses_file'):
+        with open(options['courses_file']) as courses_file:
+            course_ids += [line.strip() for line in courses_file if line.strip() and not line.startswith('#')]
+    if options.get('all_courses'):
+        course_ids += [
+            str(course_key) for course_key in CourseUserGroup.objects.filter(
+                group_type=CourseUserGroup.COHORT
+            ).values_list('course_id', flat=True).distinct()
+        ]
+    if not course_ids:
+        raise CommandError('Provide course ids, --courses-file or --all-courses')
+
+    # Drop duplicates while keeping the given order
+    return list(dict.fromkeys(course_ids))
+
+
+def _run_course(task):
+    """
+    Run the handler for a single course and capture its result or error.
+    """
+    handler, course_id, kwargs = task
+    try:
+        return course_id, handler(course_id, **kwargs), None
+    except Exception as e:  # pylint: disable=broad-except
+        return course_id, None, str(e)
+
+
+def _close_connections():
+    """
+    Make sure every worker process opens its own database connections.
+    """
+    connections.close_all()
+
+
+def run_for_courses(handler, course_ids, processes=1, **kwargs):
+    """
+    Call `handler(course_id, **kwargs)` for every course and yield
+    `(course_id, result, error)` tuples as courses complete.
+
+    A failing course is reported through `error` and doesn't stop the run.
+    `handler` must be a module level function so it can be sent to the workers.
+    """
+    tasks = [(handler, course_id, kwargs) for course_id in course_ids]
+    if processes <= 1:
+        for task in tasks:
+            yield _run_course(task)
+        return
+
+    # Connections must not be shared with the forked workers
+    _close_connections()
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes=processes, initializer=_close_connections) as pool:
+        for outcome in pool.imap_unordered(_run_course, tasks):
+            yield outcome
@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+BATCH_SIZE = 1000
+
+
+def backfill_workgroup_cohorts(apps, schema_editor):
+    """
+    Link existing workgroups to the cohorts that were created for them by name.
+    """
+    Workgroup = apps.get_model('edx_solutions_projects', 'Workgroup')
+    CourseUserGroup = apps.get_model('course_groups', 'CourseUserGroup')
+
+    projects = Workgroup.objects.filter(cohort__isnull=True).values_list(
+        'project_id', 'project__course_id'
+    ).distinct()
+    for project_id, course_id in projects:
+        try:
+            course_key = CourseKey.from_string(course_id)
+        except InvalidKeyError:
+            continue
+
+        workgroups = Workgroup.objects.filter(project_id=project_id, cohort__isnull=True).values_list('id', 'name')
+        cohort_names = {
+            'Group Project {} Workgroup {} ({})'.format(project_id, workgroup_id, name): workgroup_id
+            for workgroup_id, name in workgroups
+        }
+        names = list(cohort_names)
+        for start in range(0, len(names), BATCH_SIZE):
+            cohorts = CourseUserGroup.objects.filter(
+                course_id=course_key,
+                group_type='cohort',
+                name__in=names[start:start + BATCH_SIZE],
+            ).values_list('name', 'id')
+            Workgroup.objects.bulk_update(
+                [Workgroup(id=cohort_names[name], cohort_id=cohort_id) for name, cohort_id in cohorts],
+                ['cohort'],
+                batch_size=BATCH_SIZE,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_groups', '0001_initial'),
+        ('edx_solutions_projects', '0002_auto_20190228_0038'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workgroup',
+            name='cohort',
+            field=models.ForeignKey(related_name='workgroups', on_delete=django.db.models.deletion.SET_NULL, blank=True, to='course_groups.CourseUserGroup', null=True),
+        ),
+        migrations.RunPython(backfill_workgroup_cohorts, migrations.RunPython.noop),
+    ]
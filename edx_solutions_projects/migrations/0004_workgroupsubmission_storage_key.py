@@ -0,0 +1,51 @@
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+SUBMISSIONS_STORAGE_PREFIX = 'group_work/'
+
+
+def storage_key_for_url(document_url):
+    path = urlparse(unquote(document_url or '')).path.lstrip('/')
+    media_prefix = urlparse(settings.MEDIA_URL or '').path.strip('/')
+    if media_prefix and path.startswith(media_prefix + '/'):
+        path = path[len(media_prefix) + 1:]
+    elif not path.startswith(SUBMISSIONS_STORAGE_PREFIX) and '/' + SUBMISSIONS_STORAGE_PREFIX in path:
+        path = path[path.index('/' + SUBMISSIONS_STORAGE_PREFIX) + 1:]
+    return path or None
+
+
+def backfill_storage_keys(apps, schema_editor):
+    """
+    Populate the storage key of existing submissions from their document URL, in batches.
+    """
+    WorkgroupSubmission = apps.get_model('edx_solutions_projects', 'WorkgroupSubmission')
+    last_id = 0
+    while True:
+        submissions = list(
+            WorkgroupSubmission.objects.filter(id__gt=last_id).order_by('id').only('id', 'document_url')[:BATCH_SIZE]
+        )
+        if not submissions:
+            break
+        for submission in submissions:
+            submission.storage_key = storage_key_for_url(submission.document_url)
+        WorkgroupSubmission.objects.bulk_update(submissions, ['storage_key'])
+        last_id = submissions[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_solutions_projects', '0003_workgroup_cohort'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workgroupsubmission',
+            name='storage_key',
+            field=models.CharField(db_index=True, max_length=512, null=True, blank=True),
+        ),
+        migrations.RunPython(backfill_storage_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+import re
+
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+SHA1_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+def sha1_for_storage_key(storage_key):
+    parts = (storage_key or '').split('/')
+    if len(parts) >= 4 and parts[0] == 'group_work' and SHA1_RE.match(parts[2]):
+        return parts[2]
+    return None
+
+
+def backfill_submission_blobs(apps, schema_editor):
+    """
+    Register the files of existing submissions as blobs, counting the submissions referencing each.
+
+    When the same content was stored under several keys only the first key becomes the shared
+    blob; the other copies are left as unshared files.
+    """
+    SubmissionBlob = apps.get_model('edx_solutions_projects', 'SubmissionBlob')
+    WorkgroupSubmission = apps.get_model('edx_solutions_projects', 'WorkgroupSubmission')
+
+    references = WorkgroupSubmission.objects.filter(
+        storage_key__startswith='group_work/'
+    ).values('storage_key').annotate(refcount=Count('id')).order_by('storage_key')
+
+    batch = []
+    for reference in references.iterator():
+        if sha1_for_storage_key(reference['storage_key']):
+            batch.append(reference)
+        if len(batch) >= BATCH_SIZE:
+            _create_blobs(SubmissionBlob, batch)
+            batch = []
+    if batch:
+        _create_blobs(SubmissionBlob, batch)
+
+
+def _create_blobs(SubmissionBlob, references):
+    blobs = {}
+    for reference in references:
+        sha1 = sha1_for_storage_key(reference['storage_key'])
+        if sha1 not in blobs:
+            blobs[sha1] = SubmissionBlob(sha1=sha1, storage_key=reference['storage_key'], refcount=reference['refcount'])
+    existing = set(SubmissionBlob.objects.filter(sha1__in=list(blobs)).values_list('sha1', flat=True))
+    SubmissionBlob.objects.bulk_create([blob for sha1, blob in blobs.items() if sha1 not in existing])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_solutions_projects', '0004_workgroupsubmission_storage_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionBlob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, verbose_name='created', editable=False)),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, verbose_name='modified', editable=False)),
+                ('sha1', models.CharField(max_length=40, unique=True)),
+                ('storage_key', models.CharField(db_index=True, max_length=512)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_submission_blobs, migrations.RunPython.noop),
+    ]
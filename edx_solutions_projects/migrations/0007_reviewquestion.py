@@ -0,0 +1,124 @@
+import hashlib
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+REVIEW_MODELS = ('WorkgroupReview', 'WorkgroupSubmissionReview', 'WorkgroupPeerReview')
+
+
+def intern_questions(apps, schema_editor):
+    """
+    Point every review at the interned question of its text, in batches, with one
+    UPDATE per distinct question of a batch.
+    """
+    ReviewQuestion = apps.get_model('edx_solutions_projects', 'ReviewQuestion')
+    question_ids = {}
+    for model_name in REVIEW_MODELS:
+        model = apps.get_model('edx_solutions_projects', model_name)
+        last_id = 0
+        while True:
+            batch = list(
+                model.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'question')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            review_ids = defaultdict(list)
+            for review_id, question in batch:
+                review_ids[question].append(review_id)
+            for question, ids in review_ids.items():
+                if question not in question_ids:
+                    question_ids[question] = ReviewQuestion.objects.get_or_create(
+                        text_hash=hashlib.sha1(question.encode('utf-8')).hexdigest(),
+                        defaults={'text': question},
+                    )[0].id
+                model.objects.filter(id__in=ids).update(question_ref=question_ids[question])
+            last_id = batch[-1][0]
+
+
+def restore_questions(apps, schema_editor):
+    """
+    Copy the interned question texts back to the reviews, one UPDATE per question.
+    """
+    ReviewQuestion = apps.get_model('edx_solutions_projects', 'ReviewQuestion')
+    for model_name in REVIEW_MODELS:
+        model = apps.get_model('edx_solutions_projects', model_name)
+        for question_id, text in ReviewQuestion.objects.values_list('id', 'text').iterator():
+            model.objects.filter(question_ref=question_id).update(question=text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_solutions_projects', '0006_review_reviewer_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewQuestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=40, unique=True)),
+                ('text', models.CharField(max_length=1024)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='workgroupreview',
+            name='question_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='edx_solutions_projects.ReviewQuestion'),
+        ),
+        migrations.AlterField(
+            model_name='workgroupreview',
+            name='question',
+            field=models.CharField(blank=True, max_length=1024, null=True),
+        ),
+        migrations.AddField(
+            model_name='workgroupsubmissionreview',
+            name='question_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='edx_solutions_projects.ReviewQuestion'),
+        ),
+        migrations.AlterField(
+            model_name='workgroupsubmissionreview',
+            name='question',
+            field=models.CharField(blank=True, max_length=1024, null=True),
+        ),
+        migrations.AddField(
+            model_name='workgrouppeerreview',
+            name='question_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='edx_solutions_projects.ReviewQuestion'),
+        ),
+        migrations.AlterField(
+            model_name='workgrouppeerreview',
+            name='question',
+            field=models.CharField(blank=True, max_length=1024, null=True),
+        ),
+        migrations.RunPython(intern_questions, restore_questions),
+        migrations.AlterField(
+            model_name='workgroupreview',
+            name='question_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='edx_solutions_projects.ReviewQuestion'),
+        ),
+        migrations.RemoveField(
+            model_name='workgroupreview',
+            name='question',
+        ),
+        migrations.AlterField(
+            model_name='workgroupsubmissionreview',
+            name='question_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='edx_solutions_projects.ReviewQuestion'),
+        ),
+        migrations.RemoveField(
+            model_name='workgroupsubmissionreview',
+            name='question',
+        ),
+        migrations.AlterField(
+            model_name='workgrouppeerreview',
+            name='question_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='edx_solutions_projects.ReviewQuestion'),
+        ),
+        migrations.RemoveField(
+            model_name='workgrouppeerreview',
+            name='question',
+        ),
+    ]
@@ -0,0 +1,59 @@
+from functools import reduce
+from operator import or_
+
+from django.db import migrations
+from django.db.models import Count, Max, Q
+
+BATCH_SIZE = 500
+REVIEW_KEYS = {
+    'WorkgroupReview': ('workgroup_id', 'reviewer', 'question_ref_id', 'content_id'),
+    'WorkgroupSubmissionReview': ('submission_id', 'reviewer', 'question_ref_id', 'content_id'),
+    'WorkgroupPeerReview': ('workgroup_id', 'user_id', 'reviewer', 'question_ref_id', 'content_id'),
+}
+
+
+def delete_older_reviews(model, key_fields, duplicates):
+    keys = reduce(or_, (Q(**{field: duplicate[field] for field in key_fields}) for duplicate in duplicates))
+    model.objects.filter(keys).exclude(id__in=[duplicate['latest_id'] for duplicate in duplicates]).delete()
+
+
+def compact_reviews(apps, schema_editor):
+    """
+    Keep only the latest review of every key before adding the unique constraints, in batches of keys.
+    """
+    for model_name, key_fields in REVIEW_KEYS.items():
+        model = apps.get_model('edx_solutions_projects', model_name)
+        duplicates = model.objects.order_by().values(*key_fields).annotate(
+            latest_id=Max('id'), reviews=Count('id')
+        ).filter(reviews__gt=1)
+        batch = []
+        for duplicate in duplicates.iterator():
+            batch.append(duplicate)
+            if len(batch) == BATCH_SIZE:
+                delete_older_reviews(model, key_fields, batch)
+                batch = []
+        if batch:
+            delete_older_reviews(model, key_fields, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_solutions_projects', '0007_reviewquestion'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_reviews, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='workgroupreview',
+            unique_together={('workgroup', 'reviewer', 'question_ref', 'content_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='workgroupsubmissionreview',
+            unique_together={('submission', 'reviewer', 'question_ref', 'content_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='workgrouppeerreview',
+            unique_together={('workgroup', 'user', 'reviewer', 'question_ref', 'content_id')},
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_solutions_projects', '0008_review_unique_answers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workgroupreview',
+            index=models.Index(fields=['reviewer'], name='projects_wgrev_reviewer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgroupreview',
+            index=models.Index(fields=['content_id'], name='projects_wgrev_content_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgroupreview',
+            index=models.Index(fields=['modified', 'id'], name='projects_wgrev_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgroupsubmissionreview',
+            index=models.Index(fields=['reviewer'], name='projects_subrev_reviewer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgroupsubmissionreview',
+            index=models.Index(fields=['content_id'], name='projects_subrev_content_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgroupsubmissionreview',
+            index=models.Index(fields=['modified', 'id'], name='projects_subrev_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgrouppeerreview',
+            index=models.Index(fields=['reviewer'], name='projects_peerrev_reviewer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgrouppeerreview',
+            index=models.Index(fields=['content_id'], name='projects_peerrev_content_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgrouppeerreview',
+            index=models.Index(fields=['modified', 'id'], name='projects_peerrev_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workgroupsubmission',
+            index=models.Index(fields=['modified', 'id'], name='projects_sub_modified_idx'),
+        ),
+    ]
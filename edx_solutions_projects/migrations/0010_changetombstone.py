@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('edx_solutions_projects', '0009_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=32)),
+                ('object_id', models.IntegerField()),
+                ('project_id', models.IntegerField(blank=True, null=True)),
+                ('course_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('deleted', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='changetombstone',
+            index=models.Index(fields=['project_id', 'deleted', 'id'], name='projects_tomb_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changetombstone',
+            index=models.Index(fields=['course_id', 'deleted', 'id'], name='projects_tomb_course_idx'),
+        ),
+    ]
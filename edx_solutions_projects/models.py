@@ -1,12 +1,34 @@
 """ Database ORM models managed by this Django app """
 
+import hashlib
+import re
+from collections import Counter
+from datetime import timedelta
 from urllib.parse import unquote, urlparse
 
+from django.conf import settings
 from django.contrib.auth.models import Group, User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.core.files.storage import default_storage
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Avg, Case, Count, DecimalField, F, Max, Min, Q, When
+from django.db.models.functions import Cast
+from django.utils import timezone
 from model_utils.models import TimeStampedModel
+from student.models import AnonymousUserId
+
+from .utils import DAY, bump_cache_version_on_commit, delete_storage_files, get_cache_version, get_cache_versions
+
+SUBMISSIONS_STORAGE_PREFIX = 'group_work/'
+SHA1_RE = re.compile(r'^[0-9a-f]{40}$')
+REVIEW_STATS_CACHE = 'review_stats'  # cache versioned per project
+USER_WORKGROUPS_CACHE = 'user_workgroups'  # cache versioned per user
+WORKGROUP_CACHE = 'workgroup'  # cache versioned per workgroup
+USER_WORKGROUPS_CACHE_TIMEOUT = DAY
+CHANGE_TOMBSTONE_RETENTION_DAYS = 90
+NUMERIC_ANSWER_REGEX = r'^-?[0-9]{1,15}(\.[0-9]{1,10})?$'
+REVIEW_STATS_CACHE_TIMEOUT = 60 * 60
+WORKGROUP_CACHE_TIMEOUT = 60 * 60
 
 
 class Project(TimeStampedModel):
@@ -53,11 +75,18 @@ class Workgroup(TimeStampedModel):
     project = models.ForeignKey(Project, related_name="workgroups", on_delete=models.CASCADE)
     users = models.ManyToManyField(User, related_name="workgroups", through="WorkgroupUser", blank=True)
     groups = models.ManyToManyField(Group, related_name="workgroups", blank=True)
+    cohort = models.ForeignKey(
+        'course_groups.CourseUserGroup',
+        blank=True,
+        null=True,
+        related_name="workgroups",
+        on_delete=models.SET_NULL
+    )
 
     @property
     def cohort_name(self):
         return Workgroup.cohort_name_for_workgroup(
-            self.project.id,
+            self.project_id,
             self.id,
             self.name
         )
@@ -91,6 +120,33 @@ class Workgroup(TimeStampedModel):
 
         return query
 
+    @classmethod
+    def get_user_workgroups(cls, user_id, course_id, content_id=None):
+        """
+        Returns the workgroups of a user in a course, optionally only the one of the project of
+        a content_id, as dicts. Cached per user and course until the next membership change of the user.
+        """
+        timeout = getattr(settings, 'PROJECTS_USER_WORKGROUPS_CACHE_TIMEOUT', USER_WORKGROUPS_CACHE_TIMEOUT)
+        cache_key = 'edx_solutions_projects.user_workgroups.{}.{}.{}'.format(
+            user_id,
+            get_cache_version(USER_WORKGROUPS_CACHE, user_id),
+            hashlib.sha1(course_id.encode('utf-8')).hexdigest(),
+        )
+        workgroups = cache.get(cache_key) if timeout else None
+        if workgroups is None:
+            # Goes through the user index of the memberships and the course index of the projects
+            workgroups = [
+                {'id': workgroup_id, 'name': name, 'project': project_id, 'content_id': project_content_id}
+                for workgroup_id, name, project_id, project_content_id in cls.objects.filter(
+                    users=user_id, project__course_id=course_id,
+                ).order_by('id').values_list('id', 'name', 'project_id', 'project__content_id')
+            ]
+            if timeout:
+                cache.set(cache_key, workgroups, timeout)
+        if content_id is not None:
+            workgroups = [workgroup for workgroup in workgroups if workgroup['content_id'] == content_id]
+        return workgroups
+
 
 class WorkgroupUser(models.Model):
     """A Folder to store some data between a client and its insurance"""
@@ -112,7 +168,232 @@ class WorkgroupUser(models.Model):
         return super().save(**kwargs)
 
 
-class WorkgroupReview(TimeStampedModel):
+class ReviewQuestionManager(models.Manager):
+    """
+    Interning of the review question texts.
+    """
+
+    def intern(self, text):
+        """
+        :return: the id of the question with the given text, created if needed
+        """
+        return self.intern_many([text])[text]
+
+    def intern_many(self, texts):
+        """
+        :return: a dict of question ids keyed by the given texts, creating the missing questions
+        """
+        hashes = {ReviewQuestion.hash_for_text(text): text for text in set(texts)}
+        question_ids = dict(self.filter(text_hash__in=list(hashes)).values_list('text_hash', 'id'))
+        missing = [ReviewQuestion(text_hash=text_hash, text=hashes[text_hash])
+                   for text_hash in hashes if text_hash not in question_ids]
+        if missing:
+            # Concurrent writers may create the same questions, read the ids back afterwards
+            self.bulk_create(missing, ignore_conflicts=True)
+            question_ids = dict(self.filter(text_hash__in=list(hashes)).values_list('text_hash', 'id'))
+        return {text: question_ids[text_hash] for text_hash, text in hashes.items()}
+
+
+class ReviewQuestion(models.Model):
+    """
+    Model representing a review question.  The question texts repeated by every
+    review row are stored once here and referenced by the reviews.
+    """
+    text_hash = models.CharField(max_length=40, unique=True)  # SHA-1 of the text
+    text = models.CharField(max_length=1024)
+
+    objects = ReviewQuestionManager()
+
+    @classmethod
+    def hash_for_text(cls, text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class ReviewQuestionMixin(models.Model):
+    """
+    References the interned `ReviewQuestion` of a review, while still exposing the
+    question text as the `question` attribute. A new text is interned when the review is saved.
+    """
+    question_ref = models.ForeignKey(ReviewQuestion, related_name="+", on_delete=models.PROTECT)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def question(self):
+        if getattr(self, '_question', None) is not None:
+            return self._question
+        return self.question_ref.text if self.question_ref_id else None
+
+    @question.setter
+    def question(self, text):
+        self._question = text
+        self._question_changed = True
+
+    def save(self, **kwargs):
+        if getattr(self, '_question_changed', False):
+            self.question_ref_id = ReviewQuestion.objects.intern(self._question)
+            self._question_changed = False
+        return super().save(**kwargs)
+
+
+class ReviewerUserMixin(models.Model):
+    """
+    Stores the user behind the AnonymousUserId `reviewer` of a review, resolved when the
+    review is saved, so that reviewer data can be joined and filtered on directly.
+    """
+    reviewer_user = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL
+    )
+
+    class Meta:
+        abstract = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The reviewer the stored reviewer_user was resolved for, it is resolved again when the reviewer changes
+        self._reviewer_user_for = self.__dict__.get('reviewer') if self.__dict__.get('reviewer_user_id') else None
+
+    @classmethod
+    def get_reviewer_user_ids(cls, reviewers):
+        """
+        :return: a dict of user ids keyed by the given AnonymousUserIds, missing the unknown ones
+        """
+        return dict(AnonymousUserId.objects.filter(
+            anonymous_user_id__in=set(reviewers)
+        ).values_list('anonymous_user_id', 'user_id'))
+
+    def save(self, **kwargs):
+        if self.reviewer_user_id is None or self.reviewer != self._reviewer_user_for:
+            reviewer_user_ids = self.get_reviewer_user_ids([self.reviewer]) if self.reviewer else {}
+            self.reviewer_user_id = reviewer_user_ids.get(self.reviewer)
+            self._reviewer_user_for = self.reviewer
+        return super().save(**kwargs)
+
+
+class ReviewManager(models.Manager):
+    """
+    Insert-or-update of review answers on their unique (target, reviewer, question, content_id) key.
+    """
+    update_fields = ('answer', 'reviewer_user', 'modified')
+
+    @property
+    def key_fields(self):
+        return [self.model._meta.get_field(name) for name in self.model._meta.unique_together[0]]
+
+    def _key(self, review):
+        return {field.attname: getattr(review, field.attname) for field in self.key_fields}
+
+    def get_project_ids(self, reviews):
+        """
+        :return: the ids of the projects of the targets of `reviews`
+        """
+        return self._get_target_values(reviews, self.model.target_project_lookup)
+
+    def get_workgroup_ids(self, reviews):
+        """
+        :return: the ids of the workgroups of the targets of `reviews`
+        """
+        return self._get_target_values(reviews, self.model.target_workgroup_lookup)
+
+    def _get_target_values(self, reviews, lookup):
+        target = self.key_fields[0]
+        return set(target.related_model.objects.filter(
+            pk__in={getattr(review, target.attname) for review in reviews}
+        ).values_list(lookup, flat=True))
+
+    def upsert(self, review):
+        """
+        Insert `review`, or update the answer of the existing review with the same key.
+
+        :return: the stored review
+        """
+        self.upsert_many([review])
+        # Rows with a NULL key column aren't unique, the most recent one is the one updated
+        return self.filter(**self._key(review)).order_by('-id').first()
+
+    def upsert_many(self, reviews, batch_size=500):
+        """
+        Insert or update `reviews` with the database insert-or-update statement, in batches.
+        Later reviews win over earlier ones with the same key.
+        """
+        reviews = list(reviews)
+        self._resolve(reviews)
+        now = timezone.now()
+        unique_reviews = {}
+        for review in reviews:
+            review.modified = now
+            unique_reviews[tuple(self._key(review).values())] = review
+        keyed = [review for review in unique_reviews.values() if review.content_id is not None]
+        unkeyed = [review for review in unique_reviews.values() if review.content_id is None]
+
+        with transaction.atomic(using=self.db):
+            for start in range(0, len(keyed), batch_size):
+                self._upsert_batch(keyed[start:start + batch_size])
+            # Unique indexes never match NULL content ids, those reviews are looked up instead
+            for review in unkeyed:
+                existing_id = self.filter(**self._key(review)).order_by('-id').values_list('id', flat=True).first()
+                if existing_id is None:
+                    review.save()
+                else:
+                    self.filter(id=existing_id).update(
+                        answer=review.answer, reviewer_user_id=review.reviewer_user_id, modified=now
+                    )
+            # The statements above don't send the model signals
+            bump_cache_version_on_commit(REVIEW_STATS_CACHE, self.get_project_ids(reviews))
+            bump_cache_version_on_commit(WORKGROUP_CACHE, self.get_workgroup_ids(reviews))
+
+    def _resolve(self, reviews):
+        """
+        Intern the questions and resolve the reviewer users of `reviews` with one query each.
+        """
+        question_ids = ReviewQuestion.objects.intern_many(
+            review.question for review in reviews if getattr(review, '_question_changed', False)
+        )
+        unresolved = [
+            review for review in reviews
+            if review.reviewer_user_id is None or review.reviewer != review._reviewer_user_for
+        ]
+        user_ids = self.model.get_reviewer_user_ids(review.reviewer for review in unresolved)
+        for review in reviews:
+            if getattr(review, '_question_changed', False):
+                review.question_ref_id = question_ids[review.question]
+                review._question_changed = False
+        for review in unresolved:
+            review.reviewer_user_id = user_ids.get(review.reviewer)
+            review._reviewer_user_for = review.reviewer
+
+    def _upsert_batch(self, reviews):
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        fields = [field for field in self.model._meta.concrete_fields if not field.primary_key]
+        update_columns = [quote_name(self.model._meta.get_field(name).column) for name in self.update_fields]
+        if connection.vendor == 'mysql':
+            on_conflict = 'ON DUPLICATE KEY UPDATE {}'.format(
+                ', '.join('{0} = VALUES({0})'.format(column) for column in update_columns)
+            )
+        else:
+            on_conflict = 'ON CONFLICT ({}) DO UPDATE SET {}'.format(
+                ', '.join(quote_name(field.column) for field in self.key_fields),
+                ', '.join('{0} = excluded.{0}'.format(column) for column in update_columns)
+            )
+        sql = 'INSERT INTO {} ({}) VALUES {} {}'.format(
+            quote_name(self.model._meta.db_table),
+            ', '.join(quote_name(field.column) for field in fields),
+            ', '.join(['({})'.format(', '.join(['%s'] * len(fields)))] * len(reviews)),
+            on_conflict,
+        )
+        params = [field.get_db_prep_save(getattr(review, field.attname), connection)
+                  for review in reviews for field in fields]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class WorkgroupReview(ReviewerUserMixin, ReviewQuestionMixin, TimeStampedModel):
     """
     Model representing the Workgroup Review concept.  A Workgroup Review is
     a single question/answer combination for a particular Workgroup in the
@@ -121,10 +402,129 @@ class WorkgroupReview(TimeStampedModel):
     """
     workgroup = models.ForeignKey(Workgroup, related_name="workgroup_reviews", on_delete=models.CASCADE)
     reviewer = models.CharField(max_length=255)  # AnonymousUserId
-    question = models.CharField(max_length=1024)
     answer = models.TextField()
     content_id = models.CharField(max_length=255, null=True, blank=True)
 
+    objects = ReviewManager()
+    target_project_lookup = 'project_id'
+    target_workgroup_lookup = 'id'
+
+    class Meta:
+        """ Meta class for defining additional model characteristics """
+        unique_together = ("workgroup", "reviewer", "question_ref", "content_id")
+        indexes = [
+            models.Index(fields=["reviewer"], name="projects_wgrev_reviewer_idx"),
+            models.Index(fields=["content_id"], name="projects_wgrev_content_idx"),
+            models.Index(fields=["modified", "id"], name="projects_wgrev_modified_idx"),
+        ]
+
+
+class SubmissionBlobManager(models.Manager):
+    """
+    Reference counting of the files shared by workgroup submissions.
+    """
+
+    def acquire(self, storage_key, verified=False):
+        """
+        Take a reference on the stored file with the same content as `storage_key`.
+
+        Keys are named by clients, so the file of a key whose content was not verified is only
+        shared once `share_verified` checked it; until then it stays unshared.
+
+        :return: the storage key the submission should use, the one of the already stored copy
+            when one exists
+        """
+        sha1 = SubmissionBlob.sha1_for_storage_key(storage_key)
+        if sha1 is None:
+            return storage_key
+
+        with transaction.atomic():
+            if verified:
+                blob, __ = self.select_for_update().get_or_create(sha1=sha1, defaults={'storage_key': storage_key})
+            else:
+                blob = self.select_for_update().filter(sha1=sha1, storage_key=storage_key).first()
+                if blob is None:
+                    return storage_key
+            self.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+        return blob.storage_key
+
+    def share_verified(self, storage_key):
+        """
+        Share the file of `storage_key`, once its content was checked against the SHA-1 in its key,
+        with every submission of the same content: the submissions referencing it take references
+        on the blob of that content, and move to the already stored copy when there is one.
+
+        :return: True if the file is now a duplicate of the stored copy and can be deleted
+        """
+        sha1 = SubmissionBlob.sha1_for_storage_key(storage_key)
+        with transaction.atomic():
+            submissions = WorkgroupSubmission.objects.select_for_update().filter(storage_key=storage_key)
+            references = list(submissions.values_list('id', 'workgroup_id'))
+            if sha1 is None or not references:
+                return False
+            blob, __ = self.select_for_update().get_or_create(sha1=sha1, defaults={'storage_key': storage_key})
+            self.filter(pk=blob.pk).update(refcount=F('refcount') + len(references))
+            if blob.storage_key == storage_key:
+                return False
+            # The submissions keep their own document URL, only the stored object is shared
+            WorkgroupSubmission.objects.filter(id__in=[pk for pk, __ in references]).update(
+                storage_key=blob.storage_key
+            )
+            bump_cache_version_on_commit(WORKGROUP_CACHE, {workgroup_id for __, workgroup_id in references})
+        return True
+
+    def release_many(self, storage_keys):
+        """
+        Drop one reference per occurrence in `storage_keys`, once the referencing submissions are deleted.
+
+        :return: the storage keys whose files are no longer referenced and can be deleted
+        """
+        references = Counter(storage_key for storage_key in storage_keys if storage_key)
+        if not references:
+            return []
+
+        unreferenced = []
+        with transaction.atomic():
+            blobs = self.select_for_update().filter(storage_key__in=list(references))
+            for blob in blobs:
+                if blob.refcount > references[blob.storage_key]:
+                    self.filter(pk=blob.pk).update(refcount=F('refcount') - references[blob.storage_key])
+                else:
+                    blob.delete()
+                    unreferenced.append(blob.storage_key)
+                del references[blob.storage_key]
+
+            # Files stored before content addressing are deleted unless another submission still uses them
+            if references:
+                still_used = set(WorkgroupSubmission.objects.filter(
+                    storage_key__in=list(references)
+                ).values_list('storage_key', flat=True))
+                unreferenced += [storage_key for storage_key in references if storage_key not in still_used]
+        return unreferenced
+
+
+class SubmissionBlob(TimeStampedModel):
+    """
+    Model representing a stored submission file.  Files are addressed by the
+    SHA-1 of their content, so every submission of the same content shares one
+    stored object, which is deleted once its reference count drops to zero.
+    """
+    sha1 = models.CharField(max_length=40, unique=True)
+    storage_key = models.CharField(max_length=512, db_index=True)
+    refcount = models.PositiveIntegerField(default=0)
+
+    objects = SubmissionBlobManager()
+
+    @classmethod
+    def sha1_for_storage_key(cls, storage_key):
+        """
+        :return: the content hash embedded in a group_work/<workgroup>/<sha1>/<filename> key, if any
+        """
+        parts = (storage_key or '').split('/')
+        if len(parts) >= 4 and parts[0] + '/' == SUBMISSIONS_STORAGE_PREFIX and SHA1_RE.match(parts[2]):
+            return parts[2]
+        return None
+
 
 class WorkgroupSubmission(TimeStampedModel):
     """
@@ -138,22 +538,81 @@ class WorkgroupSubmission(TimeStampedModel):
     document_url = models.CharField(max_length=2048)
     document_mime_type = models.CharField(max_length=255)
     document_filename = models.CharField(max_length=255, blank=True, null=True)
+    storage_key = models.CharField(max_length=512, blank=True, null=True, db_index=True)
+
+    class Meta:
+        """ Meta class for defining additional model characteristics """
+        indexes = [
+            models.Index(fields=["modified", "id"], name="projects_sub_modified_idx"),
+        ]
+
+    @classmethod
+    def storage_key_for_url(cls, document_url):
+        """
+        :return: the path in default storage of the document served from `document_url`
+        """
+        path = urlparse(unquote(document_url or '')).path.lstrip('/')
+        media_prefix = urlparse(settings.MEDIA_URL or '').path.strip('/')
+        if media_prefix and path.startswith(media_prefix + '/'):
+            path = path[len(media_prefix) + 1:]
+        elif not path.startswith(SUBMISSIONS_STORAGE_PREFIX) and '/' + SUBMISSIONS_STORAGE_PREFIX in path:
+            # e.g. path-style S3 URLs, where the bucket name precedes the key
+            path = path[path.index('/' + SUBMISSIONS_STORAGE_PREFIX) + 1:]
+        return path or None
 
     @property
     def document_path(self):
         """
         :return: the path to the document in default storage
         """
-        return urlparse(unquote(self.document_url)).path.lstrip('/media/')
+        return self.storage_key or self.storage_key_for_url(self.document_url)
+
+    def save(self, content_verified=False, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Save the submission, taking a reference on its stored file when its document changes.
+
+        :param content_verified: whether the server checked that the uploaded file has the content
+            its key claims, so that it can be shared right away
+        """
+        previous_key = None
+        if not self._state.adding:
+            previous_url, previous_key = WorkgroupSubmission.objects.filter(pk=self.pk).values_list(
+                'document_url', 'storage_key'
+            ).first() or (None, None)
+            if previous_url == self.document_url:
+                if not self.storage_key:
+                    self.storage_key = self.storage_key_for_url(self.document_url)
+                return super().save(**kwargs)
+
+        # Only the reference counts are updated in the transaction, the storage is never read there
+        # and unreferenced files are deleted once it is committed
+        uploaded_key = self.storage_key_for_url(self.document_url)
+        with transaction.atomic():
+            # The submission keeps its own document URL and filename, only the stored object is shared
+            self.storage_key = SubmissionBlob.objects.acquire(uploaded_key, verified=content_verified)
+            result = super().save(**kwargs)
+
+            released_keys = [previous_key] if previous_key else []
+            if uploaded_key != self.storage_key:
+                # The same content is already stored, drop the duplicate upload
+                released_keys.append(uploaded_key)
+            unreferenced_keys = SubmissionBlob.objects.release_many(released_keys)
+
+        if unreferenced_keys:
+            transaction.on_commit(lambda: delete_storage_files(unreferenced_keys))
+        return result
 
     def delete_file(self):
         """
-        Delete uploaded file before deleting the submission.
+        Delete uploaded file with the submission, unless other submissions share it.
         """
-        default_storage.delete(self.document_path)
+        unreferenced_keys = SubmissionBlob.objects.release_many([self.document_path])
+        if unreferenced_keys:
+            # Not while the deleting transaction holds the locks on the blobs
+            transaction.on_commit(lambda: delete_storage_files(unreferenced_keys))
 
 
-class WorkgroupSubmissionReview(TimeStampedModel):
+class WorkgroupSubmissionReview(ReviewerUserMixin, ReviewQuestionMixin, TimeStampedModel):
     """
     Model representing the Submission Review concept.  A Submission Review is
     essentially a single question/answer combination for a particular Submission,
@@ -162,12 +621,24 @@ class WorkgroupSubmissionReview(TimeStampedModel):
     """
     submission = models.ForeignKey(WorkgroupSubmission, related_name="reviews", on_delete=models.CASCADE)
     reviewer = models.CharField(max_length=255)  # AnonymousUserId
-    question = models.CharField(max_length=1024)
     answer = models.TextField()
     content_id = models.CharField(max_length=255, null=True, blank=True)
 
+    objects = ReviewManager()
+    target_project_lookup = 'workgroup__project_id'
+    target_workgroup_lookup = 'workgroup_id'
+
+    class Meta:
+        """ Meta class for defining additional model characteristics """
+        unique_together = ("submission", "reviewer", "question_ref", "content_id")
+        indexes = [
+            models.Index(fields=["reviewer"], name="projects_subrev_reviewer_idx"),
+            models.Index(fields=["content_id"], name="projects_subrev_content_idx"),
+            models.Index(fields=["modified", "id"], name="projects_subrev_modified_idx"),
+        ]
+
 
-class WorkgroupPeerReview(TimeStampedModel):
+class WorkgroupPeerReview(ReviewerUserMixin, ReviewQuestionMixin, TimeStampedModel):
     """
     Model representing the Peer Review concept.  A Peer Review is a record of a
     specific question/answer defined in the Group Project XBlock schema.  There
@@ -176,6 +647,179 @@ class WorkgroupPeerReview(TimeStampedModel):
     workgroup = models.ForeignKey(Workgroup, related_name="peer_reviews", on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name="workgroup_peer_reviewees", on_delete=models.CASCADE)
     reviewer = models.CharField(max_length=255)  # AnonymousUserId
-    question = models.CharField(max_length=1024)
     answer = models.TextField()
     content_id = models.CharField(max_length=255, null=True, blank=True)
+
+    objects = ReviewManager()
+    target_project_lookup = 'project_id'
+    target_workgroup_lookup = 'id'
+
+    class Meta:
+        """ Meta class for defining additional model characteristics """
+        unique_together = ("workgroup", "user", "reviewer", "question_ref", "content_id")
+        indexes = [
+            models.Index(fields=["reviewer"], name="projects_peerrev_reviewer_idx"),
+            models.Index(fields=["content_id"], name="projects_peerrev_content_idx"),
+            models.Index(fields=["modified", "id"], name="projects_peerrev_modified_idx"),
+        ]
+
+
+def _question_stats(reviews):
+    """
+    Aggregate reviews per content_id and question in the database: the number of answers
+    and the count, min, max and mean of the numeric ones.
+    """
+    numeric = Q(answer__regex=NUMERIC_ANSWER_REGEX)
+    numeric_answer = Case(When(numeric, then=Cast('answer', DecimalField(max_digits=25, decimal_places=10))))
+    stats = reviews.order_by().values('content_id', 'question_ref_id').annotate(
+        question=F('question_ref__text'),
+        count=Count('id'),
+        numeric_count=Count(numeric_answer),
+        min=Min(numeric_answer),
+        max=Max(numeric_answer),
+        mean=Avg(numeric_answer),
+    ).order_by('content_id', 'question_ref_id')
+    return [
+        {
+            'content_id': row['content_id'],
+            'question': row['question'],
+            'count': row['count'],
+            'numeric_count': row['numeric_count'],
+            'min': float(row['min']) if row['min'] is not None else None,
+            'max': float(row['max']) if row['max'] is not None else None,
+            'mean': float(row['mean']) if row['mean'] is not None else None,
+        }
+        for row in stats
+    ]
+
+
+def get_review_stats(project_id, workgroup_id=None, content_id=None):
+    """
+    Per question stats of the workgroup and submission reviews of a Project, or of one of its
+    Workgroups, cached until the next review write of the Project.
+    """
+    timeout = getattr(settings, 'PROJECTS_REVIEW_STATS_CACHE_TIMEOUT', REVIEW_STATS_CACHE_TIMEOUT)
+    cache_key = 'edx_solutions_projects.review_stats.{}.{}.{}.{}'.format(
+        project_id, get_cache_version(REVIEW_STATS_CACHE, project_id), workgroup_id or '', content_id or ''
+    )
+    stats = cache.get(cache_key) if timeout else None
+    if stats is None:
+        workgroup_reviews = WorkgroupReview.objects.filter(workgroup__project=project_id)
+        submission_reviews = WorkgroupSubmissionReview.objects.filter(submission__workgroup__project=project_id)
+        if workgroup_id is not None:
+            workgroup_reviews = workgroup_reviews.filter(workgroup=workgroup_id)
+            submission_reviews = submission_reviews.filter(submission__workgroup=workgroup_id)
+        if content_id is not None:
+            workgroup_reviews = workgroup_reviews.filter(content_id=content_id)
+            submission_reviews = submission_reviews.filter(content_id=content_id)
+        stats = {
+            'workgroup_reviews': _question_stats(workgroup_reviews),
+            'submission_reviews': _question_stats(submission_reviews),
+        }
+        if timeout:
+            cache.set(cache_key, stats, timeout)
+    return stats
+
+
+def get_workgroup_payloads(request, workgroup_ids, serializer_cls, queryset):
+    """
+    The `serializer_cls` payloads of Workgroups, read through a cache keyed by Workgroup id and
+    version, so only the Workgroups changed since they were cached are queried and serialized.
+
+    :return: the payloads by Workgroup id, without the ids missing from `queryset`
+    """
+    timeout = getattr(settings, 'PROJECTS_WORKGROUP_CACHE_TIMEOUT', WORKGROUP_CACHE_TIMEOUT)
+    context = {'request': request}
+    if not timeout:
+        return {
+            workgroup.id: serializer_cls(workgroup, context=context).data
+            for workgroup in queryset.filter(id__in=workgroup_ids)
+        }
+
+    # Payloads hold absolute URLs, so they are cached per host
+    host = hashlib.sha1(request.build_absolute_uri('/').encode('utf-8')).hexdigest()
+    versions = get_cache_versions(WORKGROUP_CACHE, workgroup_ids)
+    cache_keys = {
+        'edx_solutions_projects.workgroup.{}.{}.{}.{}'.format(
+            serializer_cls.__name__, workgroup_id, versions[workgroup_id], host
+        ): workgroup_id
+        for workgroup_id in workgroup_ids
+    }
+    payloads = {cache_keys[key]: payload for key, payload in cache.get_many(list(cache_keys)).items()}
+    missing_ids = [workgroup_id for workgroup_id in workgroup_ids if workgroup_id not in payloads]
+    if missing_ids:
+        serialized = {
+            workgroup.id: serializer_cls(workgroup, context=context).data
+            for workgroup in queryset.filter(id__in=missing_ids)
+        }
+        cache.set_many(
+            {key: serialized[workgroup_id] for key, workgroup_id in cache_keys.items() if workgroup_id in serialized},
+            timeout,
+        )
+        payloads.update(serialized)
+    return payloads
+
+
+class ChangeTombstoneManager(models.Manager):
+    """
+    Bulk recording and pruning of the deletes reported by the change feed.
+    """
+
+    def record_many(self, object_type, deleted_objects):
+        """
+        Record the deletion of objects given as `(object_id, workgroup_id)` pairs, with one
+        query resolving their projects and one insert.
+        """
+        deleted_objects = list(deleted_objects)
+        projects = {
+            workgroup_id: (project_id, course_id)
+            for workgroup_id, project_id, course_id in Workgroup.objects.filter(
+                id__in={workgroup_id for __, workgroup_id in deleted_objects}
+            ).values_list('id', 'project_id', 'project__course_id')
+        }
+        self.bulk_create([
+            ChangeTombstone(
+                object_type=object_type,
+                object_id=object_id,
+                project_id=projects.get(workgroup_id, (None, None))[0],
+                course_id=projects.get(workgroup_id, (None, None))[1],
+            )
+            for object_id, workgroup_id in deleted_objects
+        ], batch_size=500)
+
+    def get_retention_horizon(self):
+        """
+        :return: the time before which tombstones are pruned
+        """
+        days = getattr(settings, 'PROJECTS_CHANGE_TOMBSTONE_RETENTION_DAYS', CHANGE_TOMBSTONE_RETENTION_DAYS)
+        return timezone.now() - timedelta(days=days)
+
+
+class ChangeTombstone(models.Model):
+    """
+    Model recording the deletion of a submission or review, so that the change
+    feed can report deletes to incremental readers.
+    """
+    object_type = models.CharField(max_length=32)  # e.g. "submission", "peer_review"
+    object_id = models.IntegerField()
+    project_id = models.IntegerField(null=True, blank=True)
+    course_id = models.CharField(max_length=255, null=True, blank=True)
+    deleted = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        """ Meta class for defining additional model characteristics """
+        indexes = [
+            models.Index(fields=["project_id", "deleted", "id"], name="projects_tomb_project_idx"),
+            models.Index(fields=["course_id", "deleted", "id"], name="projects_tomb_course_idx"),
+        ]
+
+    objects = ChangeTombstoneManager()
+
+
+# Object types reported by the change feed, per model
+CHANGE_FEED_TYPES = {
+    WorkgroupSubmission: 'submission',
+    WorkgroupReview: 'workgroup_review',
+    WorkgroupSubmissionReview: 'submission_review',
+    WorkgroupPeerReview: 'peer_review',
+}
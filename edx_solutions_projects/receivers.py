@@ -1,12 +1,22 @@
 """
 Signal handlers supporting various gradebook use cases
 """
-from django.db.models.signals import post_delete, pre_delete
+import threading
+
+from django.contrib.auth.models import User
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from edx_solutions_organizations.models import Organization
 from edx_solutions_projects import models
 from edx_solutions_projects.models import WorkgroupSubmission, WorkgroupUser
+from edx_solutions_projects.utils import bump_cache_version, bump_cache_version_on_commit
 from xmodule.modulestore.django import SignalHandler
 
+# Submissions and reviews collected by the deletes of the current thread, by model
+_tombstones = threading.local()
+
 
 @receiver(SignalHandler.course_deleted)
 def on_course_deleted(sender, **kwargs):  # pylint: disable=W0613
@@ -61,3 +71,174 @@ def delete_empty_workgroup(instance, **_kwargs):
 def delete_submission_file(instance, **_kwargs):
     """Delete submission file when submission is deleted"""
     instance.delete_file()
+
+
+def _pending_tombstones(sender):
+    if not hasattr(_tombstones, 'pending'):
+        _tombstones.pending = {}
+    return _tombstones.pending.setdefault(sender, {})
+
+
+@receiver(request_started)
+def clear_pending_tombstones(**_kwargs):
+    """
+    Drop the submissions and reviews collected by deletes which rolled back, and so never got
+    their post_delete; the transactions of the previous request on the thread are over.
+    """
+    _tombstones.pending = {}
+
+
+@receiver(pre_delete, sender=models.WorkgroupSubmission)
+@receiver(pre_delete, sender=models.WorkgroupReview)
+@receiver(pre_delete, sender=models.WorkgroupPeerReview)
+@receiver(pre_delete, sender=models.WorkgroupSubmissionReview)
+def collect_change_tombstone(sender, instance, **_kwargs):
+    """Collect the submissions and reviews a delete is about to remove, recorded in bulk once removed"""
+    parent_id = instance.submission_id if sender is models.WorkgroupSubmissionReview else instance.workgroup_id
+    pending = _pending_tombstones(sender)
+    if not pending:
+        # Whatever is left once the deleting transaction commits is stale
+        transaction.on_commit(pending.clear)
+    pending[instance.id] = parent_id
+
+
+@receiver(post_delete, sender=models.WorkgroupSubmission)
+@receiver(post_delete, sender=models.WorkgroupReview)
+@receiver(post_delete, sender=models.WorkgroupPeerReview)
+@receiver(post_delete, sender=models.WorkgroupSubmissionReview)
+def record_change_tombstones(sender, **_kwargs):
+    """
+    Record deleted submissions and reviews for the change feed. A delete sends the post_delete
+    signals of a model after removing all its rows, so the first one records them all at once.
+    """
+    pending = _pending_tombstones(sender)
+    if not pending:
+        return
+    deleted_objects = dict(pending)
+    pending.clear()
+
+    # Rows still stored belong to an enclosing delete not done yet, or to a delete that failed,
+    # they stay pending until their own post_delete
+    still_stored = set(sender.objects.filter(id__in=list(deleted_objects)).values_list('id', flat=True))
+    pending.update((object_id, deleted_objects[object_id]) for object_id in still_stored)
+    if sender is models.WorkgroupSubmissionReview:
+        # Submissions are removed after their reviews, so they can still be resolved here
+        workgroup_ids = dict(models.WorkgroupSubmission.objects.filter(
+            id__in=set(deleted_objects.values())
+        ).values_list('id', 'workgroup_id'))
+        deleted_objects = {
+            object_id: workgroup_ids.get(submission_id) for object_id, submission_id in deleted_objects.items()
+        }
+    models.ChangeTombstone.objects.record_many(models.CHANGE_FEED_TYPES[sender], [
+        (object_id, workgroup_id) for object_id, workgroup_id in deleted_objects.items()
+        if object_id not in still_stored
+    ])
+
+
+@receiver(post_save, sender=models.WorkgroupReview)
+@receiver(post_save, sender=models.WorkgroupSubmissionReview)
+@receiver(post_save, sender=models.WorkgroupPeerReview)
+@receiver(post_delete, sender=models.WorkgroupReview)
+@receiver(post_delete, sender=models.WorkgroupSubmissionReview)
+@receiver(post_delete, sender=models.WorkgroupPeerReview)
+def invalidate_review_stats(sender, instance, **_kwargs):
+    """Invalidate the cached review stats of the project of a changed review"""
+    bump_cache_version_on_commit(models.REVIEW_STATS_CACHE, sender.objects.get_project_ids([instance]))
+
+
+@receiver(post_save, sender=WorkgroupUser)
+@receiver(post_delete, sender=WorkgroupUser)
+def invalidate_user_workgroups(instance, **_kwargs):
+    """Invalidate the cached workgroups of a user joining or leaving a workgroup"""
+    bump_cache_version_on_commit(models.USER_WORKGROUPS_CACHE, [instance.user_id])
+
+
+@receiver(post_save, sender=models.Workgroup)
+def invalidate_member_workgroups(instance, created, **_kwargs):
+    """Invalidate the cached workgroups, and so their names and content, of the members of a changed workgroup"""
+    if not created:
+        user_ids = list(WorkgroupUser.objects.filter(workgroup_id=instance.id).values_list('user_id', flat=True))
+        bump_cache_version_on_commit(models.USER_WORKGROUPS_CACHE, user_ids)
+
+
+def _invalidate_workgroup_payloads(workgroup_ids):
+    # Bumped right away as well, so that reads later in the writing transaction don't get the stale payloads
+    bump_cache_version(models.WORKGROUP_CACHE, workgroup_ids)
+    bump_cache_version_on_commit(models.WORKGROUP_CACHE, workgroup_ids)
+
+
+@receiver(post_save, sender=models.Workgroup)
+@receiver(post_save, sender=models.WorkgroupUser)
+@receiver(post_save, sender=models.WorkgroupSubmission)
+@receiver(post_save, sender=models.WorkgroupReview)
+@receiver(post_save, sender=models.WorkgroupSubmissionReview)
+@receiver(post_save, sender=models.WorkgroupPeerReview)
+@receiver(post_delete, sender=models.Workgroup)
+@receiver(post_delete, sender=models.WorkgroupUser)
+@receiver(post_delete, sender=models.WorkgroupSubmission)
+@receiver(post_delete, sender=models.WorkgroupReview)
+@receiver(post_delete, sender=models.WorkgroupSubmissionReview)
+@receiver(post_delete, sender=models.WorkgroupPeerReview)
+def invalidate_workgroup_payload(sender, instance, **_kwargs):
+    """Invalidate the cached payloads of the workgroup of a changed workgroup, member, submission or review"""
+    if sender is models.Workgroup:
+        workgroup_ids = [instance.id]
+    elif sender is models.WorkgroupSubmissionReview:
+        workgroup_ids = sender.objects.get_workgroup_ids([instance])
+    else:
+        workgroup_ids = [instance.workgroup_id]
+    _invalidate_workgroup_payloads(workgroup_ids)
+
+
+@receiver(m2m_changed, sender=models.Workgroup.users.through)
+@receiver(m2m_changed, sender=models.Workgroup.groups.through)
+def invalidate_workgroup_payload_relations(instance, action, reverse, pk_set, **_kwargs):
+    """Invalidate the cached payloads of the workgroups whose users or groups changed"""
+    if action in ('post_add', 'post_remove'):
+        workgroup_ids = pk_set if reverse else [instance.pk]
+    elif action == 'pre_clear' and reverse:
+        # Clears don't give the workgroup ids, they are read before the user or group is unlinked
+        workgroup_ids = list(instance.workgroups.values_list('id', flat=True))
+    elif action == 'post_clear' and not reverse:
+        workgroup_ids = [instance.pk]
+    else:
+        return
+    _invalidate_workgroup_payloads(workgroup_ids)
+
+
+def _invalidate_member_workgroup_payloads(user_ids):
+    workgroup_ids = list(
+        WorkgroupUser.objects.filter(user_id__in=user_ids).values_list('workgroup_id', flat=True).distinct()
+    )
+    if workgroup_ids:
+        _invalidate_workgroup_payloads(workgroup_ids)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_workgroup_payloads(instance, created, update_fields, **_kwargs):
+    """Invalidate the cached payloads of the workgroups of a changed user, which embed the user"""
+    # Logins only update last_login, which the payloads don't hold
+    if not created and set(update_fields or ()) != {'last_login'}:
+        _invalidate_member_workgroup_payloads([instance.id])
+
+
+@receiver(post_save, sender=Organization)
+def invalidate_organization_workgroup_payloads(instance, created, **_kwargs):
+    """Invalidate the cached payloads of the workgroups of the users of a changed organization"""
+    if not created:
+        _invalidate_member_workgroup_payloads(list(instance.users.values_list('id', flat=True)))
+
+
+@receiver(m2m_changed, sender=Organization.users.through)
+def invalidate_organization_users_workgroup_payloads(instance, action, reverse, pk_set, **_kwargs):
+    """Invalidate the cached payloads of the workgroups of the users joining or leaving an organization"""
+    if reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        user_ids = [instance.pk]
+    elif action in ('post_add', 'post_remove'):
+        user_ids = pk_set
+    elif action == 'pre_clear' and not reverse:
+        # Clears don't give the user ids, they are read before the users are unlinked
+        user_ids = list(instance.users.values_list('id', flat=True))
+    else:
+        return
+    _invalidate_member_workgroup_payloads(user_ids)
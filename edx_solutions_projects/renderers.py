@@ -0,0 +1,65 @@
+""" Renderers for the streaming exports of this Django app """
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+def _as_rows(data):
+    if data is None:
+        return []
+    return data if isinstance(data, list) else [data]
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renders a list of flat dicts as CSV. Exports stream their rows with
+    `csv_lines` instead, this renderer only handles regular responses, e.g. errors.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = _as_rows(data)
+        if not rows:
+            return ''
+        return ''.join(csv_lines(list(rows[0].keys()), rows))
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders a list as newline delimited JSON, one item per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ''.join(ndjson_lines(_as_rows(data)))
+
+
+def csv_lines(fieldnames, rows):
+    """
+    Yield the CSV header for `fieldnames` then one CSV line per row dict.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_lines(rows):
+    """
+    Yield one JSON document per row, newline terminated.
+    """
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
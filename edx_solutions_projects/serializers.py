@@ -1,5 +1,7 @@
 """ Django REST Framework Serializers """
+from urllib.parse import urlparse
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from edx_solutions_api_integration.groups.serializers import GroupSerializer
 from edx_solutions_organizations.models import Organization
@@ -7,7 +9,7 @@ from rest_framework import serializers
 
 from .models import (Project, Workgroup, WorkgroupPeerReview, WorkgroupReview,
                      WorkgroupSubmission, WorkgroupSubmissionReview)
-from .utils import make_temporary_s3_link
+from .utils import make_temporary_link, uses_s3_storage
 
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
@@ -77,30 +79,31 @@ class WorkgroupSubmissionBaseSerializer(serializers.HyperlinkedModelSerializer):
 
     def to_representation(self, instance):
         """
-        Create a temporary S3 link in case of S3 URL
+        Create a temporary link in case of a document kept in our storage
         """
-        response = super(WorkgroupSubmissionBaseSerializer, self).to_representation(instance)
         response = super().to_representation(instance)
 
-        if 's3.amazonaws.com' in response.get('document_url'):
-            try:
-                file_sha1 = response['document_url'].split('/')[-2]
-            except IndexError:
-                return response
-
-            file_path = "group_work/{}/{}/{}".format(
-                response['workgroup'],
-                file_sha1,
-                response['document_filename'],
+        if self._is_stored_document(response.get('document_url')) and instance.document_path:
+            temporary_link = make_temporary_link(
+                file_path=instance.document_path,
+                download_url='{}download/'.format(response['url']),
             )
 
-            temp_s3_link = make_temporary_s3_link(file_path=file_path)
-
-            if temp_s3_link is not None:
-                response['document_url'] = temp_s3_link
+            if temporary_link is not None:
+                response['document_url'] = temporary_link
 
         return response
 
+    @staticmethod
+    def _is_stored_document(document_url):
+        """
+        Whether the document is served from the default storage rather than an external link
+        """
+        if uses_s3_storage():
+            return 's3.amazonaws.com' in document_url
+        media_path = urlparse(settings.MEDIA_URL or '').path
+        return bool(media_path) and urlparse(document_url).path.startswith(media_path)
+
 
 class WorkgroupSubmissionSerializer(WorkgroupSubmissionBaseSerializer):
     """ Serializer for model interactions """
@@ -119,6 +122,7 @@ class WorkgroupSubmissionSerializer(WorkgroupSubmissionBaseSerializer):
 class WorkgroupReviewSerializer(serializers.HyperlinkedModelSerializer):
     """ Serializer for model interactions """
     workgroup = serializers.PrimaryKeyRelatedField(queryset=Workgroup.objects.all())
+    question = serializers.CharField(max_length=1024)
 
     class Meta:
         """ Meta class for defining additional serializer characteristics """
@@ -132,6 +136,7 @@ class WorkgroupReviewSerializer(serializers.HyperlinkedModelSerializer):
 class WorkgroupSubmissionReviewSerializer(serializers.HyperlinkedModelSerializer):
     """ Serializer for model interactions """
     submission = serializers.PrimaryKeyRelatedField(queryset=WorkgroupSubmission.objects.all())
+    question = serializers.CharField(max_length=1024)
 
     class Meta:
         """ Meta class for defining additional serializer characteristics """
@@ -146,6 +151,7 @@ class WorkgroupPeerReviewSerializer(serializers.HyperlinkedModelSerializer):
     """ Serializer for model interactions """
     workgroup = serializers.PrimaryKeyRelatedField(queryset=Workgroup.objects.all())
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+    question = serializers.CharField(max_length=1024)
 
     class Meta:
         """ Meta class for defining additional serializer characteristics """
@@ -11,7 +11,7 @@ from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.test.utils import override_settings
 from edx_solutions_api_integration.test_utils import APIClientMixin
-from edx_solutions_projects.models import Project, Workgroup
+from edx_solutions_projects.models import Project, Workgroup, WorkgroupPeerReview
 from student.models import anonymous_id_for_user
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import (
@@ -126,20 +126,99 @@ class PeerReviewsApiTests(ModuleStoreTestCase, APIClientMixin):
         }
         response = self.do_post(self.test_peer_reviews_uri, data)
         self.assertEqual(response.status_code, 201)
+        review_id = response.data['id']
         data = {
             'workgroup': self.test_workgroup.id,
             'user': self.test_peer_user.id,
             'reviewer': self.anonymous_user_id,
             'question': self.test_question,
-            'answer': self.test_answer,
+            'answer': 'Updated answer',
             'content_id': self.test_course_content_id
         }
         response = self.do_post(self.test_peer_reviews_uri, data)
         self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], review_id)
+        self.assertEqual(response.data['answer'], 'Updated answer')
+
+        response = self.do_get(self.test_peer_reviews_uri, query_parameters={'workgroup': self.test_workgroup.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_peer_reviews_upsert(self):
+        data = {
+            'workgroup': self.test_workgroup.id,
+            'user': self.test_peer_user.id,
+            'reviewer': self.anonymous_user_id,
+            'question': self.test_question,
+            'answer': self.test_answer,
+            'content_id': self.test_course_content_id
+        }
+        upsert_uri = '{}upsert/'.format(self.test_peer_reviews_uri)
+        response = self.do_post(upsert_uri, data)
+        self.assertEqual(response.status_code, 200)
+        review_id = response.data['id']
+
+        response = self.do_post(upsert_uri, dict(data, answer='Updated answer'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], review_id)
+        self.assertEqual(response.data['answer'], 'Updated answer')
 
-        response = self.do_get(self.test_peer_reviews_uri)
+        response = self.do_post(upsert_uri, dict(data, question='Another question'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data['results']), 2)
+        self.assertNotEqual(response.data['id'], review_id)
+
+        response = self.do_post(upsert_uri, dict(data, workgroup=None))
+        self.assertEqual(response.status_code, 400)
+
+        # NULL content ids aren't covered by the unique key, duplicates may already be stored
+        review_ids = [
+            WorkgroupPeerReview.objects.create(
+                workgroup=self.test_workgroup, user=self.test_peer_user, reviewer=self.anonymous_user_id,
+                question=self.test_question, answer=self.test_answer, content_id=None,
+            ).id
+            for __ in range(2)
+        ]
+        response = self.do_post(upsert_uri, dict(data, content_id=None, answer='Updated answer'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], review_ids[-1])
+        self.assertEqual(response.data['answer'], 'Updated answer')
+
+    def test_peer_reviews_bulk(self):
+        bulk_uri = '{}bulk/'.format(self.test_peer_reviews_uri)
+        data = [
+            {
+                'workgroup': self.test_workgroup.id,
+                'user': self.test_peer_user.id,
+                'reviewer': self.anonymous_user_id,
+                'question': 'Question {}'.format(index),
+                'answer': self.test_answer,
+                'content_id': self.test_course_content_id
+            }
+            for index in range(3)
+        ]
+        response = self.do_post(bulk_uri, data + [dict(data[0], workgroup=123456), dict(data[0], answer=None)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][:3], [{}, {}, {}])
+        self.assertIn('workgroup', response.data['errors'][3])
+        self.assertIn('answer', response.data['errors'][4])
+        self.assertEqual(response.data['errors'][4].keys(), {'answer'})
+
+        response = self.do_get(self.test_peer_reviews_uri, query_parameters={'workgroup': self.test_workgroup.id})
+        self.assertEqual(len(response.data['results']), 0)
+
+        response = self.do_post(bulk_uri, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 3)
+        response = self.do_post(bulk_uri, [dict(data[0], answer='Updated answer')])
+        self.assertEqual(response.status_code, 201)
+
+        response = self.do_get(self.test_peer_reviews_uri, query_parameters={'workgroup': self.test_workgroup.id})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(
+            {review['question']: review['answer'] for review in response.data['results']}['Question 0'],
+            'Updated answer'
+        )
+        self.assertTrue(all(review['reviewer'] == self.anonymous_user_id for review in response.data['results']))
 
     def test_peer_reviews_detail_get(self):
         data = {
@@ -171,6 +250,23 @@ class PeerReviewsApiTests(ModuleStoreTestCase, APIClientMixin):
         self.assertIsNotNone(response.data['created'])
         self.assertIsNotNone(response.data['modified'])
 
+    def test_peer_reviews_reviewer_user(self):
+        """ The reviewer user follows the AnonymousUserId of the reviewer """
+        review = WorkgroupPeerReview.objects.create(
+            workgroup=self.test_workgroup, user=self.test_peer_user, reviewer=self.anonymous_user_id,
+            question=self.test_question, answer=self.test_answer, content_id=self.test_course_content_id,
+        )
+        self.assertEqual(review.reviewer_user_id, self.test_reviewer_user.id)
+
+        review = WorkgroupPeerReview.objects.get(id=review.id)
+        review.reviewer = anonymous_id_for_user(self.test_peer_user, self.course.id)
+        review.save()
+        self.assertEqual(WorkgroupPeerReview.objects.get(id=review.id).reviewer_user_id, self.test_peer_user.id)
+
+        review.reviewer = 'unknown'
+        review.save()
+        self.assertIsNone(WorkgroupPeerReview.objects.get(id=review.id).reviewer_user_id)
+
     def test_peer_reviews_detail_get_undefined(self):
         test_uri = '{}/123456789/'.format(self.test_peer_reviews_uri)
         response = self.do_get(test_uri)
@@ -3,14 +3,34 @@
 """
 Run these tests: paver test_system -s lms -t edx_solutions_projects
 """
+import csv
+import hashlib
+import json
+import shutil
+import tempfile
 import uuid
+import zipfile
+from io import BytesIO
 
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import pre_delete
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.test.utils import override_settings
 from edx_solutions_api_integration.test_utils import APIClientMixin
-from edx_solutions_projects.models import Project, Workgroup
+from edx_solutions_organizations.models import Organization
+from edx_solutions_projects import receivers
+from edx_solutions_projects.models import (REVIEW_STATS_CACHE, USER_WORKGROUPS_CACHE, ChangeTombstone, Project,
+                                           Workgroup, WorkgroupPeerReview, WorkgroupReview, WorkgroupSubmission)
 from edx_solutions_projects.scope_resolver import GroupProjectParticipantsScopeResolver
+from edx_solutions_projects.utils import bump_cache_version
+from edx_solutions_projects.views import WorkgroupsViewSet
+from mock import patch
+from rest_framework.exceptions import PermissionDenied
+from student.models import anonymous_id_for_user
 
 
 class ProjectsApiTests(TestCase, APIClientMixin):
@@ -181,12 +201,57 @@ class ProjectsApiTests(TestCase, APIClientMixin):
     def test_projects_workgroups_post(self):
         test_uri = '{}{}/workgroups/'.format(self.test_projects_uri, self.test_project.id)
         data = {"id": self.test_workgroup.id}
-        response = self.do_post(test_uri, data)
+        with patch('edx_solutions_projects.views.bump_cache_version_on_commit') as bump:
+            response = self.do_post(test_uri, data)
         self.assertEqual(response.status_code, 201)
+        # The cached workgroups of the members include the project of the workgroup
+        bump.assert_any_call(USER_WORKGROUPS_CACHE, [self.test_user.id])
         response = self.do_get(test_uri)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data[0]['id'], self.test_workgroup.id)
 
+    def test_projects_workgroups_get_cached(self):
+        """ Workgroup payloads are cached until the workgroup, its users, submissions or reviews change """
+        test_uri = '{}{}/workgroups/'.format(self.test_projects_uri, self.test_project.id)
+        detail_uri = '/api/server/workgroups/{}/'.format(self.test_workgroup.id)
+        response = self.do_get(test_uri, query_parameters={'details': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([workgroup['submissions'] for workgroup in response.data], [[], []])
+        self.assertEqual(self.do_get(detail_uri).data['name'], self.test_workgroup.name)
+
+        # Queryset updates don't send signals, the cached payloads are served
+        Workgroup.objects.filter(id=self.test_workgroup.id).update(name='Renamed Workgroup')
+        self.assertEqual(self.do_get(test_uri, query_parameters={'details': 'true'}).data[0]['name'], 'Test Workgroup')
+        self.assertEqual(self.do_get(detail_uri).data['name'], 'Test Workgroup')
+
+        submission = WorkgroupSubmission.objects.create(
+            workgroup=self.test_workgroup, user=self.test_user, document_id='doc',
+            document_url='http://example.com/doc', document_mime_type='text/plain',
+        )
+        response = self.do_get(test_uri, query_parameters={'details': 'true'})
+        workgroups = {workgroup['id']: workgroup for workgroup in response.data}
+        self.assertEqual(workgroups[self.test_workgroup.id]['name'], 'Renamed Workgroup')
+        self.assertEqual([item['id'] for item in workgroups[self.test_workgroup.id]['submissions']], [submission.id])
+        self.assertEqual(workgroups[self.test_workgroup2.id]['submissions'], [])
+        self.assertEqual(self.do_get(detail_uri).data['submissions'], [submission.id])
+
+        # The payloads embed the members and their organizations
+        self.test_user.first_name = 'Renamed'
+        self.test_user.save()
+        organization = Organization.objects.create(name='Test Organization', display_name='Test Organization')
+        organization.users.add(self.test_user)
+        self.assertEqual(self.do_get(detail_uri).data['users'][0]['first_name'], 'Renamed')
+        response = self.do_get(test_uri, query_parameters={'details': 'true'})
+        users = {workgroup['id']: workgroup['users'] for workgroup in response.data}[self.test_workgroup.id]
+        self.assertEqual(users[0]['organizations'], [{'id': organization.id, 'display_name': 'Test Organization'}])
+
+        # Permissions are checked for cached payloads as well
+        with patch.object(WorkgroupsViewSet, 'check_object_permissions', side_effect=PermissionDenied):
+            self.assertEqual(self.do_get(detail_uri).status_code, 403)
+
+        self.assertEqual(self.do_delete(detail_uri).status_code, 204)
+        self.assertEqual(self.do_get(detail_uri).status_code, 404)
+
     def test_projects_workgroups_post_invalid_workgroup(self):
         test_uri = '{}{}/workgroups/'.format(self.test_projects_uri, self.test_project.id)
         data = {
@@ -195,6 +260,237 @@ class ProjectsApiTests(TestCase, APIClientMixin):
         response = self.do_post(test_uri, data)
         self.assertEqual(response.status_code, 400)
 
+    def test_projects_submissions_archive(self):
+        """ Tests the streamed ZIP archive of a project's submissions """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=media_root,
+            MEDIA_URL='/media/',
+        ):
+            for workgroup, user, content in ((self.test_workgroup, self.test_user, b'first'),
+                                             (self.test_workgroup2, self.test_user2, b'second')):
+                storage_key = 'group_work/{}/{}/report.pdf'.format(workgroup.id, hashlib.sha1(content).hexdigest())
+                default_storage.save(storage_key, ContentFile(content))
+                WorkgroupSubmission.objects.create(
+                    workgroup=workgroup,
+                    user=user,
+                    document_id='report.pdf',
+                    document_url='/media/{}'.format(storage_key),
+                    document_mime_type='application/pdf',
+                    document_filename='report.pdf',
+                )
+
+            test_uri = '{}{}/submissions_archive/'.format(self.test_projects_uri, self.test_project.id)
+            response = self.do_get(test_uri)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/zip')
+            archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(archive.read('Test Workgroup/report.pdf'), b'first')
+            self.assertEqual(archive.read('Test Workgroup2/report.pdf'), b'second')
+
+    @patch('edx_solutions_projects.views.EXPORT_CHUNK_SIZE', 1)
+    def test_projects_workgroup_reviews_export(self):
+        """ Tests the streamed CSV and NDJSON exports of a project's workgroup reviews """
+        reviewer = anonymous_id_for_user(self.test_user, None)
+        for workgroup, answer in ((self.test_workgroup, 'yes'), (self.test_workgroup2, 'no')):
+            WorkgroupReview.objects.create(
+                workgroup=workgroup, reviewer=reviewer, question='Done?', answer=answer, content_id='block'
+            )
+        test_uri = '{}{}/workgroup_reviews/'.format(self.test_projects_uri, self.test_project.id)
+
+        response = self.do_get('{}?format=ndjson'.format(test_uri))
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['answer'] for row in rows], ['yes', 'no'])
+        self.assertEqual([row['workgroup_name'] for row in rows], ['Test Workgroup', 'Test Workgroup2'])
+        self.assertEqual({row['reviewer_email'] for row in rows}, {self.test_user.email})
+
+        response = self.do_get('{}?format=csv'.format(test_uri))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row['answer'] for row in rows], ['yes', 'no'])
+        self.assertEqual(rows[0]['reviewer_email'], self.test_user.email)
+
+        response = self.do_get(test_uri)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    @override_settings(PROJECTS_CHANGE_FEED_SAFETY_LAG=0)
+    def test_projects_changes(self):
+        """ Tests the incremental change feed of a project's submissions and reviews """
+        changes_uri = '{}changes/'.format(self.test_projects_uri)
+        reviews = [
+            WorkgroupReview.objects.create(
+                workgroup=self.test_workgroup, reviewer='reviewer', question='Q{}'.format(index), answer='A',
+                content_id='block',
+            )
+            for index in range(3)
+        ]
+        response = self.do_get(changes_uri)
+        self.assertEqual(response.status_code, 400)
+
+        # Rows changed within the safety lag may still be followed by rows committing late
+        with override_settings(PROJECTS_CHANGE_FEED_SAFETY_LAG=60):
+            response = self.do_get(changes_uri, query_parameters={'project_id': self.test_project.id})
+            self.assertEqual(response.data['changes'], [])
+            self.assertFalse(response.data['has_more'])
+
+        response = self.do_get(changes_uri, query_parameters={'project_id': self.test_project.id, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([change['data']['id'] for change in response.data['changes']], [r.id for r in reviews[:2]])
+        self.assertTrue(response.data['has_more'])
+
+        cursor = response.data['cursor']
+        response = self.do_get(changes_uri, query_parameters={'project_id': self.test_project.id, 'cursor': cursor})
+        self.assertEqual([change['data']['id'] for change in response.data['changes']], [reviews[2].id])
+        self.assertFalse(response.data['has_more'])
+
+        cursor = response.data['cursor']
+        reviews[0].answer = 'B'
+        reviews[0].save()
+        reviews[1].delete()
+        response = self.do_get(changes_uri, query_parameters={'course_id': self.test_course_id, 'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(change['type'], change['data']['id']) for change in response.data['changes']],
+            [('workgroup_review', reviews[0].id)]
+        )
+        self.assertEqual(
+            [(deleted['type'], deleted['id']) for deleted in response.data['deleted']],
+            [('workgroup_review', reviews[1].id)]
+        )
+
+        response = self.do_get(changes_uri, query_parameters={'project_id': self.test_project2.id})
+        self.assertEqual(response.data['changes'], [])
+
+        # Deletes cascading from a workgroup are recorded together
+        cascaded = [
+            WorkgroupReview.objects.create(
+                workgroup=self.test_workgroup2, reviewer='reviewer', question='Q{}'.format(index), answer='A',
+            )
+            for index in range(2)
+        ]
+        self.test_workgroup2.delete()
+        self.assertEqual(
+            set(ChangeTombstone.objects.filter(project_id=self.test_project.id).values_list('object_id', flat=True)),
+            {reviews[1].id} | {review.id for review in cascaded}
+        )
+
+        # The rows collected by a delete which rolled back are dropped at the next request
+        pre_delete.send(sender=WorkgroupReview, instance=reviews[0], using='default')
+        self.assertEqual(receivers._pending_tombstones(WorkgroupReview), {reviews[0].id: self.test_workgroup.id})
+        self.do_get(changes_uri, query_parameters={'project_id': self.test_project.id})
+        self.assertEqual(receivers._pending_tombstones(WorkgroupReview), {})
+
+        with override_settings(PROJECTS_CHANGE_TOMBSTONE_RETENTION_DAYS=1):
+            response = self.do_get(changes_uri, query_parameters={
+                'project_id': self.test_project.id, 'since': '2000-01-01T00:00:00Z',
+            })
+            self.assertEqual(response.status_code, 410)
+
+    def test_projects_peer_review_matrix(self):
+        """ Tests the peer review completion matrix of a project """
+        self.test_workgroup.add_user(User.objects.create(email='test3@edx.org', username='testing3'))
+        users = list(self.test_workgroup.users.order_by('id'))
+        reviewer = anonymous_id_for_user(users[0], None)
+        for question in ('Q1', 'Q2'):
+            WorkgroupPeerReview.objects.create(
+                workgroup=self.test_workgroup, user=users[1], reviewer=reviewer, question=question, answer='A',
+                content_id='block',
+            )
+        # A review stored before reviewer_user, not backfilled
+        legacy_review = WorkgroupPeerReview.objects.create(
+            workgroup=self.test_workgroup, user=users[0], reviewer=anonymous_id_for_user(users[1], None),
+            question='Q1', answer='A', content_id='block',
+        )
+        WorkgroupPeerReview.objects.filter(id=legacy_review.id).update(reviewer_user=None)
+
+        test_uri = '{}{}/peer_review_matrix/'.format(self.test_projects_uri, self.test_project.id)
+        response = self.do_get(test_uri)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['content_ids'], ['block'])
+        workgroups = {workgroup['id']: workgroup for workgroup in response.data['workgroups']}
+        self.assertEqual(workgroups[self.test_workgroup.id]['users'], [user.id for user in users])
+        self.assertEqual(workgroups[self.test_workgroup.id]['answered'], [[[0, 2], [1, 0]]])
+        self.assertEqual(workgroups[self.test_workgroup2.id]['answered'], [[[0]]])
+
+    def test_projects_review_stats(self):
+        """ Tests the per question review stats of a project and of a workgroup """
+        for workgroup, reviewer, answer in ((self.test_workgroup, 'r1', '3'), (self.test_workgroup, 'r2', '5'),
+                                            (self.test_workgroup2, 'r1', '4.5'), (self.test_workgroup2, 'r2', 'n/a')):
+            WorkgroupReview.objects.create(
+                workgroup=workgroup, reviewer=reviewer, question='Score', answer=answer, content_id='block'
+            )
+
+        response = self.do_get('{}{}/review_stats/'.format(self.test_projects_uri, self.test_project.id))
+        self.assertEqual(response.status_code, 200)
+        stats = response.data['workgroup_reviews']
+        self.assertEqual(len(stats), 1)
+        self.assertAlmostEqual(stats[0].pop('mean'), 12.5 / 3, places=6)
+        self.assertEqual(stats[0], {
+            'content_id': 'block', 'question': 'Score', 'count': 4, 'numeric_count': 3, 'min': 3.0, 'max': 5.0,
+        })
+        self.assertEqual(response.data['submission_reviews'], [])
+
+        workgroup_stats_uri = '/api/server/workgroups/{}/review_stats/'.format(self.test_workgroup.id)
+        response = self.do_get(workgroup_stats_uri)
+        self.assertEqual(response.data['workgroup_reviews'][0]['count'], 2)
+        self.assertEqual(response.data['workgroup_reviews'][0]['mean'], 4.0)
+
+        # Stats are cached until the next review write of the project is committed
+        WorkgroupReview.objects.create(
+            workgroup=self.test_workgroup, reviewer='r3', question='Score', answer='10', content_id='block'
+        )
+        response = self.do_get(workgroup_stats_uri)
+        self.assertEqual(response.data['workgroup_reviews'][0]['count'], 2)
+        bump_cache_version(REVIEW_STATS_CACHE, [self.test_project.id])
+        response = self.do_get(workgroup_stats_uri)
+        self.assertEqual(response.data['workgroup_reviews'][0]['count'], 3)
+
+    def test_projects_batch(self):
+        """ Tests dispatching several sub-requests in one batch request """
+        batch_uri = '{}batch/'.format(self.test_projects_uri)
+        response = self.do_post(batch_uri, {'requests': [
+            {'method': 'GET', 'path': '{}{}/'.format(self.test_projects_uri, self.test_project.id)},
+            {'method': 'GET', 'path': '/api/server/workgroups/{}/'.format(self.test_workgroup.id)},
+            {'method': 'POST', 'path': '/api/server/workgroup_reviews/', 'body': {
+                'workgroup': self.test_workgroup.id, 'reviewer': 'r1', 'question': 'Q', 'answer': 'A',
+                'content_id': 'block',
+            }},
+            {'method': 'GET', 'path': '{}123456789/'.format(self.test_projects_uri)},
+            {'method': 'GET', 'path': '/not/an/api/route/'},
+            {'method': 'POST', 'path': batch_uri, 'body': {'requests': []}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        responses = response.data['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200, 201, 404, 404, 400])
+        self.assertEqual(responses[0]['body']['id'], self.test_project.id)
+        self.assertEqual(responses[1]['body']['name'], self.test_workgroup.name)
+        self.assertTrue(WorkgroupReview.objects.filter(workgroup=self.test_workgroup, reviewer='r1').exists())
+
+        response = self.do_post(batch_uri, {'requests': []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_projects_batch_errors(self):
+        """ Tests that a failing sub-request is a 500 of its own and streamed sub-responses are closed """
+        batch_uri = '{}batch/'.format(self.test_projects_uri)
+        project_uri = '{}{}/'.format(self.test_projects_uri, self.test_project.id)
+        with patch('edx_solutions_projects.views.get_review_stats', side_effect=ValueError('broken')), \
+                patch.object(StreamingHttpResponse, 'close', autospec=True) as close:
+            response = self.do_post(batch_uri, {'requests': [
+                {'method': 'GET', 'path': '{}review_stats/'.format(project_uri)},
+                {'method': 'GET', 'path': '{}submissions_archive/'.format(project_uri)},
+                {'method': 'GET', 'path': project_uri},
+            ]})
+        self.assertEqual(response.status_code, 200)
+        responses = response.data['responses']
+        self.assertEqual([item['status'] for item in responses], [500, 200, 200])
+        self.assertIsNone(responses[1]['body'])
+        self.assertEqual(close.call_count, 1)
+
     def test_projects_detail_get_undefined(self):
         test_uri = '{}/123456789/'.format(self.test_projects_uri)
         response = self.do_get(test_uri)
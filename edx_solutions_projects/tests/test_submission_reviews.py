@@ -113,19 +113,24 @@ class SubmissionReviewsApiTests(ModuleStoreTestCase, APIClientMixin):
         }
         response = self.do_post(self.test_submission_reviews_uri, data)
         self.assertEqual(response.status_code, 201)
+        review_id = response.data['id']
         data = {
             'submission': self.test_submission.id,
             'reviewer': self.anonymous_user_id,
             'question': self.test_question,
-            'answer': self.test_answer,
+            'answer': 'Updated answer',
             'content_id': self.test_course_content_id,
         }
         response = self.do_post(self.test_submission_reviews_uri, data)
         self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], review_id)
+        self.assertEqual(response.data['answer'], 'Updated answer')
 
-        response = self.do_get(self.test_submission_reviews_uri)
+        response = self.do_get(
+            self.test_submission_reviews_uri, query_parameters={'submission': self.test_submission.id}
+        )
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_submission_reviews_detail_get(self):
         data = {
@@ -0,0 +1,101 @@
+"""
+Run these tests: paver test_system -s lms -t edx_solutions_projects
+"""
+import zipfile
+from io import BytesIO
+
+from botocore.exceptions import ClientError
+from django.test import TestCase
+from edx_solutions_projects.utils import BufferedEventEmitter, stream_zip
+from mock import call, patch
+
+
+@patch('edx_solutions_projects.utils.tracker')
+class BufferedEventEmitterTests(TestCase):
+    """ Test suite for the buffered tracking event emitter """
+
+    def test_events_emitted_in_order_on_flush(self, mock_tracker):
+        emitter = BufferedEventEmitter(batch_size=2, background=False)
+        for index in range(5):
+            emitter.add('test.event', {'index': index})
+        self.assertEqual(mock_tracker.emit.call_count, 0)
+
+        emitter.flush()
+        self.assertEqual(
+            mock_tracker.emit.call_args_list,
+            [call('test.event', {'index': index}) for index in range(5)]
+        )
+        self.assertEqual(emitter.emitted, 5)
+        self.assertEqual(emitter.dropped, 0)
+        self.assertEqual(emitter.events, [])
+
+    def test_failed_and_discarded_events_counted_as_dropped(self, mock_tracker):
+        mock_tracker.emit.side_effect = [None, Exception('backend down'), None]
+        emitter = BufferedEventEmitter(background=False)
+        for index in range(3):
+            emitter.add('test.event', {'index': index})
+        emitter.flush()
+        self.assertEqual(emitter.emitted, 2)
+        self.assertEqual(emitter.dropped, 1)
+
+        emitter.add('test.event', {'index': 3})
+        emitter.discard()
+        emitter.flush()
+        self.assertEqual(mock_tracker.emit.call_count, 3)
+        self.assertEqual(emitter.dropped, 2)
+
+    def test_background_flush(self, mock_tracker):
+        emitter = BufferedEventEmitter(background=True)
+        emitter.add('test.event', {'index': 0})
+        emitter.add('test.event', {'index': 1})
+        emitter.flush()
+        emitter.thread.join()
+        self.assertEqual(
+            mock_tracker.emit.call_args_list,
+            [call('test.event', {'index': 0}), call('test.event', {'index': 1})]
+        )
+        self.assertEqual(emitter.emitted, 2)
+
+
+class FakeS3Body:
+    """ The streamed body of an S3 object, failing at the exceptions among its chunks """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_chunks(self, chunk_size):  # pylint: disable=unused-argument
+        for chunk in self.chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class StreamZipTests(TestCase):
+    """ Test suite for the streamed ZIP archives """
+
+    @patch('edx_solutions_projects.utils.uses_s3_storage', return_value=True)
+    @patch('edx_solutions_projects.utils.get_s3_client')
+    def test_storage_errors(self, mock_get_s3_client, __):
+        objects = {
+            'broken': [b'partial', ClientError({'Error': {'Code': 'InternalError'}}, 'GetObject')],
+            'ok': [b'partial', b' content'],
+        }
+
+        def get_object(Bucket, Key):  # pylint: disable=invalid-name,unused-argument
+            if Key not in objects:
+                raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+            return {'Body': FakeS3Body(objects[Key])}
+
+        mock_get_s3_client.return_value.get_object.side_effect = get_object
+        with self.settings(AWS_STORAGE_BUCKET_NAME='bucket'):
+            data = b''.join(stream_zip([('a.txt', 'missing'), ('b.txt', 'broken'), ('c.txt', 'ok')]))
+
+        archive = zipfile.ZipFile(BytesIO(data))
+        self.assertEqual(archive.namelist(), ['b.txt', 'c.txt'])
+        self.assertEqual(archive.read('b.txt'), b'partial')
+        self.assertEqual(archive.read('c.txt'), b'partial content')
+        # Every object is streamed with the same client
+        self.assertEqual(mock_get_s3_client.call_count, 1)
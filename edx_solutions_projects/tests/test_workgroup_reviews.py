@@ -10,8 +10,8 @@ from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.test.utils import override_settings
 from edx_solutions_api_integration.test_utils import APIClientMixin
-from edx_solutions_projects.models import (Project, Workgroup,
-                                           WorkgroupSubmission)
+from edx_solutions_projects.models import (Project, ReviewQuestion, Workgroup,
+                                           WorkgroupReview, WorkgroupSubmission)
 from student.models import anonymous_id_for_user
 from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_SPLIT_MODULESTORE, ModuleStoreTestCase)
@@ -113,19 +113,79 @@ class WorkgroupReviewsApiTests(ModuleStoreTestCase, APIClientMixin):
         }
         response = self.do_post(self.test_workgroup_reviews_uri, data)
         self.assertEqual(response.status_code, 201)
+        review_id = response.data['id']
         data = {
             'workgroup': self.test_workgroup.id,
             'reviewer': self.anonymous_user_id,
             'question': self.test_question,
-            'answer': self.test_answer,
+            'answer': 'Updated answer',
             'content_id': self.test_course_content_id,
         }
         response = self.do_post(self.test_workgroup_reviews_uri, data)
         self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], review_id)
+        self.assertEqual(response.data['answer'], 'Updated answer')
+
+        response = self.do_get(self.test_workgroup_reviews_uri, query_parameters={'workgroup': self.test_workgroup.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_workgroup_reviews_list_filters(self):
+        for index in range(3):
+            response = self.do_post(self.test_workgroup_reviews_uri, {
+                'workgroup': self.test_workgroup.id,
+                'reviewer': self.anonymous_user_id,
+                'question': 'Question {}'.format(index),
+                'answer': self.test_answer,
+                'content_id': self.test_course_content_id if index else 'other-content-id',
+            })
+            self.assertEqual(response.status_code, 201)
 
         response = self.do_get(self.test_workgroup_reviews_uri)
+        self.assertEqual(response.status_code, 400)
+        response = self.do_get(self.test_workgroup_reviews_uri, query_parameters={'workgroups': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.do_get(self.test_workgroup_reviews_uri, query_parameters={'modified_after': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.do_get(
+            self.test_workgroup_reviews_uri,
+            query_parameters={'project': self.test_project.id, 'content_id': self.test_course_content_id}
+        )
         self.assertEqual(response.status_code, 200)
+        self.assertEqual([review['question'] for review in response.data['results']], ['Question 1', 'Question 2'])
+
+        response = self.do_get(
+            self.test_workgroup_reviews_uri,
+            query_parameters={'workgroups': '{},123456'.format(self.test_workgroup.id), 'page_size': 2}
+        )
         self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        response = self.do_get(response.data['next'])
+        self.assertEqual([review['question'] for review in response.data['results']], ['Question 2'])
+        self.assertIsNone(response.data['next'])
+
+    def test_workgroup_reviews_share_questions(self):
+        data = {
+            'workgroup': self.test_workgroup.id,
+            'reviewer': self.anonymous_user_id,
+            'question': self.test_question,
+            'answer': self.test_answer,
+            'content_id': self.test_course_content_id,
+        }
+        first = self.do_post(self.test_workgroup_reviews_uri, data)
+        second = self.do_post(self.test_workgroup_reviews_uri, dict(data, content_id='other-content-id'))
+        self.assertEqual(second.status_code, 201)
+        reviews = WorkgroupReview.objects.filter(id__in=[first.data['id'], second.data['id']])
+        self.assertEqual({review.question_ref_id for review in reviews}, {ReviewQuestion.objects.get().id})
+        self.assertEqual({review.question for review in reviews}, {self.test_question})
+
+        review = WorkgroupReview.objects.get(id=second.data['id'])
+        review.question = 'Another question'
+        review.save()
+        response = self.do_get('{}{}/'.format(self.test_workgroup_reviews_uri, review.id))
+        self.assertEqual(response.data['question'], 'Another question')
+        self.assertEqual(ReviewQuestion.objects.count(), 2)
 
     def test_workgroup_reviews_detail_get(self):
         data = {
@@ -3,11 +3,21 @@
 """
 Run these tests: paver test_system -s lms -t edx_solutions_projects
 """
+import hashlib
+import shutil
+import tempfile
+
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from edx_solutions_api_integration.test_utils import APIClientMixin
-from edx_solutions_projects.models import Project, Workgroup
+from edx_solutions_projects.models import (USER_WORKGROUPS_CACHE, Project, SubmissionBlob, Workgroup,
+                                           WorkgroupPeerReview, WorkgroupReview, WorkgroupSubmission)
+from edx_solutions_projects.utils import bump_cache_version
 from mock import patch
 
 
@@ -143,6 +153,309 @@ class SubmissionsApiTests(TestCase, APIClientMixin):
         self.assertIsNotNone(response.data['created'])
         self.assertIsNotNone(response.data['modified'])
 
+    @override_settings(MEDIA_URL='/media/')
+    def test_submissions_storage_key(self):
+        """ The storage key is derived from the document URL when the submission is saved """
+        urls = {
+            '/media/group_work/1/abc/image.png': 'group_work/1/abc/image.png',
+            '/media/dead%20file.pdf': 'dead file.pdf',
+            'https://bucket.s3.amazonaws.com/group_work/1/abc/report.pdf': 'group_work/1/abc/report.pdf',
+            'https://s3.amazonaws.com/bucket/group_work/1/abc/report.pdf': 'group_work/1/abc/report.pdf',
+        }
+        for document_url, storage_key in urls.items():
+            submission = WorkgroupSubmission.objects.create(
+                user=self.test_user,
+                workgroup=self.test_workgroup,
+                document_id=self.test_document_id,
+                document_url=document_url,
+                document_mime_type=self.test_document_mime_type,
+            )
+            self.assertEqual(WorkgroupSubmission.objects.get(id=submission.id).storage_key, storage_key)
+
+    @override_settings(MEDIA_URL='/media/')
+    @patch('edx_solutions_projects.models.transaction.on_commit', side_effect=lambda func: func())
+    @patch('edx_solutions_projects.models.delete_storage_files')
+    def test_submissions_share_stored_content(self, mock_delete_files, __):
+        """ Submissions of the same verified content share one stored file, deleted with its last reference """
+        other_workgroup = Workgroup.objects.create(name="Other Workgroup", project=self.test_project)
+        sha1 = 'a' * 40
+        submissions = []
+        for workgroup in (self.test_workgroup, other_workgroup):
+            submission = WorkgroupSubmission(
+                user=self.test_user,
+                workgroup=workgroup,
+                document_id=self.test_document_id,
+                document_url='/media/group_work/{}/{}/report.pdf'.format(workgroup.id, sha1),
+                document_mime_type=self.test_document_mime_type,
+            )
+            submission.save(content_verified=True)
+            submissions.append(submission)
+        shared_key = 'group_work/{}/{}/report.pdf'.format(self.test_workgroup.id, sha1)
+        self.assertEqual([submission.storage_key for submission in submissions], [shared_key, shared_key])
+        self.assertEqual(
+            submissions[1].document_url, '/media/group_work/{}/{}/report.pdf'.format(other_workgroup.id, sha1)
+        )
+        self.assertEqual(SubmissionBlob.objects.get(sha1=sha1).refcount, 2)
+        # The duplicate upload is deleted
+        mock_delete_files.assert_called_once_with(['group_work/{}/{}/report.pdf'.format(other_workgroup.id, sha1)])
+        mock_delete_files.reset_mock()
+
+        submissions[0].delete()
+        mock_delete_files.assert_not_called()
+        self.assertEqual(SubmissionBlob.objects.get(sha1=sha1).refcount, 1)
+
+        submissions[1].delete()
+        mock_delete_files.assert_called_once_with([shared_key])
+        self.assertFalse(SubmissionBlob.objects.filter(sha1=sha1).exists())
+
+    @override_settings(MEDIA_URL='/media/')
+    def test_submissions_share_only_verified_content(self):
+        """ A key claiming the content of a stored file is not shared unless its own content matches """
+        sha1 = 'a' * 40
+        shared_key = 'group_work/{}/{}/report.pdf'.format(self.test_workgroup.id, sha1)
+        SubmissionBlob.objects.create(sha1=sha1, storage_key=shared_key, refcount=1)
+        other_workgroup = Workgroup.objects.create(name="Other Workgroup", project=self.test_project)
+        claimed_key = 'group_work/{}/{}/report.pdf'.format(other_workgroup.id, sha1)
+        submission = WorkgroupSubmission.objects.create(
+            user=self.test_user,
+            workgroup=other_workgroup,
+            document_id=self.test_document_id,
+            document_url='/media/{}'.format(claimed_key),
+            document_mime_type=self.test_document_mime_type,
+        )
+        self.assertEqual(submission.storage_key, claimed_key)
+        self.assertEqual(SubmissionBlob.objects.get(sha1=sha1).refcount, 1)
+
+    @override_settings(MEDIA_URL='/media/')
+    @patch('edx_solutions_projects.models.delete_storage_files')
+    def test_submissions_change_document(self, mock_delete_files):
+        """ Changing the document URL of a submission moves its reference to the new file """
+        old_key = 'group_work/{}/{}/report.pdf'.format(self.test_workgroup.id, 'a' * 40)
+        new_key = 'group_work/{}/{}/report.pdf'.format(self.test_workgroup.id, 'b' * 40)
+        submission = WorkgroupSubmission(
+            user=self.test_user,
+            workgroup=self.test_workgroup,
+            document_id=self.test_document_id,
+            document_url='/media/{}'.format(old_key),
+            document_mime_type=self.test_document_mime_type,
+        )
+        submission.save(content_verified=True)
+        submission.document_url = '/media/{}'.format(new_key)
+        submission.save(content_verified=True)
+
+        self.assertEqual(WorkgroupSubmission.objects.get(id=submission.id).storage_key, new_key)
+        self.assertFalse(SubmissionBlob.objects.filter(sha1='a' * 40).exists())
+        self.assertEqual(SubmissionBlob.objects.get(sha1='b' * 40).refcount, 1)
+
+    def test_submissions_local_storage_download(self):
+        """ Documents in local storage are served through a signed download link """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=media_root,
+            MEDIA_URL='/media/',
+        ):
+            storage_key = 'group_work/{}/{}/report.pdf'.format(self.test_workgroup.id, 'c' * 40)
+            default_storage.save(storage_key, ContentFile(b'0123456789'))
+            submission_data = {
+                'user': self.test_user.id,
+                'workgroup': self.test_workgroup.id,
+                'document_id': self.test_document_id,
+                'document_url': '/media/{}'.format(storage_key),
+                'document_mime_type': self.test_document_mime_type,
+                'document_filename': 'report.pdf',
+            }
+            response = self.do_post(self.test_submissions_uri, submission_data)
+            self.assertEqual(response.status_code, 201)
+            download_url = response.data['document_url']
+            self.assertIn('{}/download/?token='.format(response.data['id']), download_url)
+
+            response = self.client.get(download_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+            response = self.client.get(download_url, HTTP_RANGE='bytes=2-5')
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+            self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+            with override_settings(
+                PROJECTS_SENDFILE_BACKEND='x-accel-redirect', PROJECTS_SENDFILE_URL_PREFIX='/protected/'
+            ):
+                response = self.client.get(download_url)
+                self.assertEqual(response['X-Accel-Redirect'], '/protected/{}'.format(storage_key))
+            with override_settings(PROJECTS_SENDFILE_BACKEND='x-accel-redirect'):
+                response = self.client.get(download_url)
+                self.assertNotIn('X-Accel-Redirect', response)
+                self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+            response = self.client.get(download_url.replace('token=', 'token=x'))
+            self.assertEqual(response.status_code, 403)
+
+    def test_submissions_local_storage_upload(self):
+        """ Documents are uploaded with a signed handshake, and known content is not uploaded again """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=media_root,
+            MEDIA_URL='/media/',
+        ):
+            content = b'uploaded content'
+            upload_data = {
+                'user': self.test_user.id,
+                'workgroup': self.test_workgroup.id,
+                'sha1': hashlib.sha1(content).hexdigest(),
+                'document_filename': 'report.pdf',
+                'document_mime_type': self.test_document_mime_type,
+            }
+            response = self.do_post('{}upload/'.format(self.test_submissions_uri), upload_data)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.data['exists'])
+            self.assertEqual(response.data['method'], 'PUT')
+            token = response.data['token']
+            upload_url = response.data['url']
+
+            response = self.do_post('{}finalize/'.format(self.test_submissions_uri), {'token': token})
+            self.assertEqual(response.status_code, 400)
+
+            response = self.client.put(upload_url, b'other content', content_type='application/octet-stream')
+            self.assertEqual(response.status_code, 400)
+            with override_settings(PROJECTS_MAX_UPLOAD_SIZE=len(content) - 1):
+                response = self.client.put(upload_url, content, content_type='application/octet-stream')
+                self.assertEqual(response.status_code, 413)
+            response = self.client.put(upload_url, content, content_type='application/octet-stream')
+            self.assertEqual(response.status_code, 201)
+            token = response.data['token']
+            response = self.client.put(upload_url.replace('token=', 'token=x'), content)
+            self.assertEqual(response.status_code, 403)
+
+            response = self.do_post('{}finalize/'.format(self.test_submissions_uri), {'token': token})
+            self.assertEqual(response.status_code, 201)
+            submission = WorkgroupSubmission.objects.get(id=response.data['id'])
+            self.assertEqual(submission.storage_key, 'group_work/{}/{}/report.pdf'.format(
+                self.test_workgroup.id, upload_data['sha1']
+            ))
+            with default_storage.open(submission.storage_key) as stored_file:
+                self.assertEqual(stored_file.read(), content)
+
+            response = self.do_post('{}upload/'.format(self.test_submissions_uri), upload_data)
+            self.assertTrue(response.data['exists'])
+            response = self.do_post('{}finalize/'.format(self.test_submissions_uri), {'token': response.data['token']})
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(
+                WorkgroupSubmission.objects.get(id=response.data['id']).storage_key, submission.storage_key
+            )
+            self.assertEqual(SubmissionBlob.objects.get(sha1=upload_data['sha1']).refcount, 2)
+
+    def test_workgroup_context(self):
+        """ The workgroup context returns the workgroup data the XBlock renders in one response """
+        submission = WorkgroupSubmission.objects.create(
+            workgroup=self.test_workgroup,
+            user=self.test_user,
+            document_id=self.test_document_id,
+            document_url=self.test_document_url,
+            document_mime_type=self.test_document_mime_type,
+            document_filename=self.test_document_filename,
+        )
+        for content_id in ('block-1', 'block-2'):
+            WorkgroupReview.objects.create(
+                workgroup=self.test_workgroup, reviewer='reviewer', question='Q', answer='A', content_id=content_id
+            )
+            WorkgroupPeerReview.objects.create(
+                workgroup=self.test_workgroup, user=self.test_user2, reviewer='reviewer', question='Q', answer='A',
+                content_id=content_id,
+            )
+
+        test_uri = '{}{}/context/'.format(self.test_workgroups_uri, self.test_workgroup.id)
+        response = self.do_get(test_uri, query_parameters={'content_id': 'block-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['workgroup']['id'], self.test_workgroup.id)
+        self.assertEqual({user['id'] for user in response.data['users']}, {self.test_user.id, self.test_user2.id})
+        self.assertEqual([item['id'] for item in response.data['submissions']], [submission.id])
+        self.assertEqual([review['content_id'] for review in response.data['workgroup_reviews']], ['block-1'])
+        self.assertEqual([review['content_id'] for review in response.data['peer_reviews']], ['block-1'])
+
+        response = self.do_get(test_uri)
+        self.assertEqual(len(response.data['peer_reviews']), 2)
+
+    def test_workgroup_context_queries(self):
+        """ The workgroup context takes the same number of queries whatever the number of members """
+        workgroup = Workgroup.objects.create(name="Context Workgroup", project=self.test_project)
+        test_uri = '{}{}/context/'.format(self.test_workgroups_uri, workgroup.id)
+
+        def add_member(index):
+            user = User.objects.create(email='member{}@edx.org'.format(index), username='member{}'.format(index))
+            workgroup.add_user(user)
+            WorkgroupSubmission.objects.create(
+                workgroup=workgroup,
+                user=user,
+                document_id=self.test_document_id,
+                document_url=self.test_document_url,
+                document_mime_type=self.test_document_mime_type,
+                document_filename=self.test_document_filename,
+            )
+            WorkgroupReview.objects.create(
+                workgroup=workgroup, reviewer='reviewer{}'.format(index), question='Q', answer='A', content_id='block'
+            )
+            WorkgroupPeerReview.objects.create(
+                workgroup=workgroup, user=user, reviewer='reviewer{}'.format(index), question='Q', answer='A',
+                content_id='block',
+            )
+
+        add_member(0)
+        # Warm up the caches of the request handling, e.g. the content types
+        self.do_get(test_uri)
+        with CaptureQueriesContext(connection) as single_member:
+            response = self.do_get(test_uri)
+        self.assertEqual(len(response.data['users']), 1)
+
+        for index in range(1, 5):
+            add_member(index)
+        with self.assertNumQueries(len(single_member.captured_queries)):
+            response = self.do_get(test_uri)
+        self.assertEqual(len(response.data['users']), 5)
+        self.assertEqual(len(response.data['submissions']), 5)
+        self.assertEqual(len(response.data['peer_reviews']), 5)
+
+    def test_workgroups_lookup(self):
+        """ The workgroups of a user in a course are looked up, and cached until its memberships change """
+        test_uri = '{}lookup/'.format(self.test_workgroups_uri)
+        response = self.do_get(
+            test_uri, query_parameters={'user_id': self.test_user.id, 'course_id': self.test_course_id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{
+            'id': self.test_workgroup.id, 'name': self.test_workgroup.name, 'project': self.test_project.id,
+            'content_id': self.test_course_content_id,
+        }])
+
+        response = self.do_get(test_uri, query_parameters={
+            'user_id': self.test_user.id,
+            'course_id': self.test_course_id,
+            'content_id': self.test_bogus_course_content_id,
+        })
+        self.assertEqual(response.data, [])
+        response = self.do_get(test_uri, query_parameters={'user_id': self.test_user.id})
+        self.assertEqual(response.status_code, 400)
+
+        other_project = Project.objects.create(
+            course_id=self.test_bogus_course_id, content_id=self.test_course_content_id
+        )
+        other_workgroup = Workgroup.objects.create(name="Other Workgroup", project=other_project)
+        other_workgroup.add_user(self.test_user)
+        self.assertEqual(Workgroup.get_user_workgroups(self.test_user.id, self.test_bogus_course_id), [])
+        bump_cache_version(USER_WORKGROUPS_CACHE, [self.test_user.id])
+        workgroups = Workgroup.get_user_workgroups(self.test_user.id, self.test_bogus_course_id)
+        self.assertEqual([workgroup['id'] for workgroup in workgroups], [other_workgroup.id])
+
+        other_workgroup.name = "Renamed Workgroup"
+        with patch('edx_solutions_projects.receivers.bump_cache_version_on_commit') as bump:
+            other_workgroup.save()
+        bump.assert_any_call(USER_WORKGROUPS_CACHE, [self.test_user.id])
+
     def test_submissions_detail_get_undefined(self):
         test_uri = '{}123456789/'.format(self.test_submissions_uri)
         response = self.do_get(test_uri)
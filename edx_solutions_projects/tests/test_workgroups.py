@@ -156,6 +156,32 @@ class WorkgroupsApiTests(SignalDisconnectTestMixin, ModuleStoreTestCase, APIClie
         )
         cohort = get_cohort_by_name(self.test_course.id, cohort_name)
         self.assertIsNotNone(cohort)
+        self.assertEqual(Workgroup.objects.get(id=response.data['id']).cohort_id, cohort.id)
+
+    @make_non_atomic
+    @ddt.data(ModuleStoreEnum.Type.split, ModuleStoreEnum.Type.mongo)
+    def test_workgroups_users_post_renamed_workgroup(self, store):
+        """ Renaming a workgroup must not break the link to its cohort """
+        self._create_course(store)
+        data = {
+            'name': self.test_workgroup_name,
+            'project': self.test_project.id
+        }
+        response = self.do_post(self.test_workgroups_uri, data)
+        self.assertEqual(response.status_code, 201)
+        workgroup = Workgroup.objects.get(id=response.data['id'])
+        cohort = workgroup.cohort
+        workgroup.name = 'Renamed Workgroup'
+        workgroup.save()
+
+        users_uri = '{}{}/users/'.format(self.test_workgroups_uri, workgroup.id)
+        response = self.do_post(users_uri, {"id": self.test_user.id})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(is_user_in_cohort(cohort, self.test_user.id))
+
+        response = self.do_delete(users_uri, {"id": self.test_user.id})
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(is_user_in_cohort(cohort, self.test_user.id))
 
     @make_non_atomic
     @ddt.data(ModuleStoreEnum.Type.split, ModuleStoreEnum.Type.mongo)
@@ -1,12 +1,62 @@
+import hashlib
+import io
+import json
+import logging
+import re
+import threading
+import time
+import zipfile
 from contextlib import contextmanager
+from urllib.parse import quote, urlencode, urlsplit
 
 import boto3
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.signals import request_finished
+from django.db import close_old_connections, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from eventtracking import tracker
+from rest_framework import status
+
+log = logging.getLogger(__name__)
 
 HOUR = 60 * 60
 DAY = 24 * HOUR
 
 S3_FILE_URL_TIMEOUT = 14 * DAY
+S3_STORAGE_BACKEND = 'storages.backends.s3boto.S3BotoStorage'
+S3_DELETE_BATCH_SIZE = 1000
+
+TRACKING_BATCH_SIZE = 500
+STREAM_CHUNK_SIZE = 64 * 1024
+
+DOWNLOAD_TOKEN_SALT = 'edx_solutions_projects.download'
+UPLOAD_TOKEN_SALT = 'edx_solutions_projects.upload'
+UPLOAD_URL_TIMEOUT = DAY
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STORAGE_ERRORS = (IOError, OSError, BotoCoreError, ClientError)
+CACHE_VERSION_TIMEOUT = 30 * DAY
+
+
+def uses_s3_storage():
+    """
+    Whether uploaded files are kept in S3
+    """
+    return settings.DEFAULT_FILE_STORAGE == S3_STORAGE_BACKEND
+
+
+def get_s3_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+    )
 
 
 def make_temporary_s3_link(file_path):
@@ -14,12 +64,8 @@ def make_temporary_s3_link(file_path):
     pre-sign url so that it can be accessible for limited time period
     i,e: S3_FILE_URL_TIMEOUT publicly.
     """
-    if settings.DEFAULT_FILE_STORAGE == 'storages.backends.s3boto.S3BotoStorage':
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-        )
+    if uses_s3_storage():
+        s3_client = get_s3_client()
         signed_url = s3_client.generate_presigned_url(
             ClientMethod='get_object',
             ExpiresIn=S3_FILE_URL_TIMEOUT,
@@ -33,6 +79,348 @@ def make_temporary_s3_link(file_path):
     return None
 
 
+def make_temporary_link(file_path, download_url):
+    """
+    Make a link to a stored file which is usable for S3_FILE_URL_TIMEOUT.
+
+    Files in S3 get a pre-signed S3 URL; for other storages `download_url`
+    gets a signed token, checked by the view serving the file.
+    """
+    if uses_s3_storage():
+        return make_temporary_s3_link(file_path)
+
+    token = signing.dumps(file_path, salt=DOWNLOAD_TOKEN_SALT)
+    return '{}?{}'.format(download_url, urlencode({'token': token}))
+
+
+def read_download_token(token):
+    """
+    :return: the file path signed in a download token
+    :raises signing.BadSignature: if the token is invalid or expired
+    """
+    return signing.loads(token, salt=DOWNLOAD_TOKEN_SALT, max_age=S3_FILE_URL_TIMEOUT)
+
+
+def serve_storage_file(request, file_path, filename, content_type):
+    """
+    Respond with a file from the default storage.
+
+    When PROJECTS_SENDFILE_BACKEND is configured the file is handed over to the
+    web server through X-Accel-Redirect (nginx, which also needs
+    PROJECTS_SENDFILE_URL_PREFIX) or X-Sendfile (Apache); otherwise it is
+    streamed from the storage, honouring Range requests.
+    """
+    backend = getattr(settings, 'PROJECTS_SENDFILE_BACKEND', None)
+    url_prefix = getattr(settings, 'PROJECTS_SENDFILE_URL_PREFIX', None)
+    if backend == 'x-accel-redirect' and url_prefix is not None:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = '{}/{}'.format(url_prefix.rstrip('/'), quote(file_path))
+    elif backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = default_storage.path(file_path)
+    else:
+        response = _ranged_file_response(request, file_path, content_type)
+
+    response['Content-Disposition'] = "attachment; filename*=UTF-8''{}".format(quote(filename))
+    return response
+
+
+def _ranged_file_response(request, file_path, content_type):
+    size = default_storage.size(file_path)
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    if not match or match.groups() == ('', ''):
+        response = FileResponse(default_storage.open(file_path, 'rb'), content_type=content_type)
+        response['Content-Length'] = size
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    first, last = match.groups()
+    if first:
+        first, last = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        # suffix range, e.g. bytes=-500 for the last 500 bytes
+        first, last = max(size - int(last), 0), size - 1
+    if first > last:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */{}'.format(size)
+        return response
+
+    source = default_storage.open(file_path, 'rb')
+    source.seek(first)
+    response = StreamingHttpResponse(_read_range(source, last - first + 1), status=206, content_type=content_type)
+    response['Content-Range'] = 'bytes {}-{}/{}'.format(first, last, size)
+    response['Content-Length'] = last - first + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _read_range(source, length, chunk_size=STREAM_CHUNK_SIZE):
+    with source:
+        while length > 0:
+            chunk = source.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def make_presigned_s3_upload(file_path, content_type, max_size):
+    """
+    Pre-sign an S3 POST so that a client can upload `file_path` directly to the bucket.
+
+    :return: the URL and form fields of the POST request
+    """
+    return get_s3_client().generate_presigned_post(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=file_path,
+        Fields={'Content-Type': content_type},
+        Conditions=[
+            {'Content-Type': content_type},
+            ['content-length-range', 0, max_size],
+        ],
+        ExpiresIn=UPLOAD_URL_TIMEOUT,
+    )
+
+
+def make_upload_token(data):
+    """
+    :return: a signed, expiring token carrying the upload data to `finalize`
+    """
+    return signing.dumps(data, salt=UPLOAD_TOKEN_SALT)
+
+
+def read_upload_token(token):
+    """
+    :return: the upload data signed in an upload token
+    :raises signing.BadSignature: if the token is invalid or expired
+    """
+    return signing.loads(token, salt=UPLOAD_TOKEN_SALT, max_age=UPLOAD_URL_TIMEOUT)
+
+
+def open_storage_chunks(file_path, chunk_size=STREAM_CHUNK_SIZE, s3_client=None):
+    """
+    Open a file of the default storage to read it chunk by chunk. S3 objects are streamed from
+    the response body, the S3 storage would first copy them to a temporary file.
+
+    :return: an iterator over the chunks of the file content, which closes the file once exhausted
+    :raises: one of STORAGE_ERRORS when the file can't be opened, or read
+    """
+    if uses_s3_storage():
+        source = (s3_client or get_s3_client()).get_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=file_path
+        )['Body']
+        chunks = source.iter_chunks(chunk_size)
+    else:
+        source = default_storage.open(file_path, 'rb')
+        chunks = iter(lambda: source.read(chunk_size), b'')
+    return _close_when_done(chunks, source)
+
+
+def _close_when_done(chunks, source):
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        source.close()
+
+
+def get_storage_file_sha1(file_path):
+    """
+    :return: the SHA-1 of the content of a file in the default storage, None when it can't be read
+    """
+    digest = hashlib.sha1()
+    try:
+        for chunk in open_storage_chunks(file_path):
+            digest.update(chunk)
+    except STORAGE_ERRORS:
+        return None
+    return digest.hexdigest()
+
+
+def get_storage_url(file_path):
+    """
+    :return: the permanent URL of a file in the default storage
+    """
+    if uses_s3_storage():
+        return 'https://{}.s3.amazonaws.com/{}'.format(settings.AWS_STORAGE_BUCKET_NAME, quote(file_path))
+    return default_storage.url(file_path)
+
+
+def delete_storage_files(file_paths):
+    """
+    Delete files from the default storage. S3 objects are removed with
+    batched `delete_objects` requests instead of one request per file.
+    """
+    file_paths = [file_path for file_path in file_paths if file_path]
+    if uses_s3_storage():
+        s3_client = get_s3_client()
+        for start in range(0, len(file_paths), S3_DELETE_BATCH_SIZE):
+            s3_client.delete_objects(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Delete={
+                    'Objects': [{'Key': file_path} for file_path in file_paths[start:start + S3_DELETE_BATCH_SIZE]],
+                    'Quiet': True,
+                }
+            )
+    else:
+        for file_path in file_paths:
+            default_storage.delete(file_path)
+
+
+def iter_storage_pages(prefix, page_size):
+    """
+    Yield pages of `(path, modified)` tuples for the files stored under `prefix`,
+    in lexicographic path order, without listing the whole storage at once.
+    """
+    if uses_s3_storage():
+        paginator = get_s3_client().get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': page_size},
+        )
+        for page in pages:
+            contents = page.get('Contents', [])
+            if contents:
+                yield [(item['Key'], item['LastModified']) for item in contents]
+        return
+
+    page = []
+    for file_path in _walk_storage(prefix.rstrip('/')):
+        page.append((file_path, default_storage.get_modified_time(file_path)))
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _walk_storage(path):
+    """
+    Recursively yield the file paths under `path` of a storage that supports `listdir`.
+    """
+    if not default_storage.exists(path):
+        return
+    directories, files = default_storage.listdir(path)
+    # Sorting directories as "name/" keeps the full paths in lexicographic order
+    entries = sorted([(name + '/', True) for name in directories] + [(name, False) for name in files])
+    for name, is_directory in entries:
+        entry_path = '{}/{}'.format(path, name.rstrip('/')) if path else name.rstrip('/')
+        if is_directory:
+            yield from _walk_storage(entry_path)
+        else:
+            yield entry_path
+
+
+class _ZipStream:
+    """
+    Write-only file object collecting the bytes written by `zipfile`, so they
+    can be handed out as soon as they are produced.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(entries, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield a ZIP archive of the `(arcname, file_path)` entries read from the default storage.
+
+    The archive is produced on the fly: files are copied chunk by chunk and nothing
+    is buffered beyond the current chunk, whatever the size of the archive.
+
+    A file that can't be opened is skipped. A file whose read fails midway is logged and
+    ends where the read failed, so that the rest of the archive is still valid.
+    """
+    stream = _ZipStream()
+    s3_client = get_s3_client() if uses_s3_storage() else None
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, file_path in entries:
+            try:
+                chunks = open_storage_chunks(file_path, chunk_size, s3_client)
+            except STORAGE_ERRORS:
+                log.warning('Skipping missing file %s in archive', file_path)
+                continue
+            with archive.open(arcname, mode='w', force_zip64=True) as target:
+                try:
+                    for chunk in chunks:
+                        target.write(chunk)
+                        data = stream.pop()
+                        if data:
+                            yield data
+                except STORAGE_ERRORS:
+                    log.exception('Truncated file %s in archive, reading it failed', file_path)
+                finally:
+                    chunks.close()
+            yield stream.pop()
+    yield stream.pop()
+
+
+def _cache_version_key(namespace, object_id):
+    return 'edx_solutions_projects.{}.version.{}'.format(namespace, object_id)
+
+
+def get_cache_version(namespace, object_id):
+    """
+    :return: the current version of the cached data of an object, e.g. the review stats of a
+        project, to be made part of the cache keys of that data
+    """
+    key = _cache_version_key(namespace, object_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock, so that entries cached before the version was evicted are not reused
+        version = int(time.time() * 1000)
+        cache.add(key, version, CACHE_VERSION_TIMEOUT)
+        version = cache.get(key, version)
+    return version
+
+
+def get_cache_versions(namespace, object_ids):
+    """
+    :return: the current versions of the cached data of several objects by object id, read
+        with one cache fetch
+    """
+    keys = {_cache_version_key(namespace, object_id): object_id for object_id in object_ids}
+    versions = cache.get_many(list(keys))
+    return {
+        object_id: versions[key] if key in versions else get_cache_version(namespace, object_id)
+        for key, object_id in keys.items()
+    }
+
+
+def bump_cache_version(namespace, object_ids):
+    """
+    Invalidate the cached data of the given objects by moving them to a new version.
+    """
+    for object_id in set(object_ids):
+        key = _cache_version_key(namespace, object_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), CACHE_VERSION_TIMEOUT)
+
+
+def bump_cache_version_on_commit(namespace, object_ids):
+    """
+    Bump the cache versions once the current transaction is committed, so that readers can't
+    cache data of the transaction under the new version before it is visible.
+    """
+    object_ids = set(object_ids)
+    transaction.on_commit(lambda: bump_cache_version(namespace, object_ids))
+
+
 @contextmanager
 def skip_signal(signal, **kwargs):
     """
@@ -42,3 +430,140 @@ def skip_signal(signal, **kwargs):
     signal.disconnect(**kwargs)
     yield
     signal.connect(**kwargs)
+
+
+def _dispatch_batch_request(request, item, views_module):
+    """
+    Dispatch one sub-request of a batch in-process to the viewset of `views_module` that serves
+    its path, with the headers, and so the authentication, of the batch request.
+
+    :return: the status code and the data of the response
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        return status.HTTP_400_BAD_REQUEST, {'detail': 'Every request needs a "path"'}
+    method = str(item.get('method', 'GET')).upper()
+    url = urlsplit(item['path'])
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {'detail': 'Not found'}
+    viewset = getattr(match.func, 'cls', None)
+    if viewset is None or viewset.__module__ != views_module or (match.url_name or '').endswith('-batch'):
+        return status.HTTP_400_BAD_REQUEST, {'detail': 'Only the routes of this API can be batched'}
+
+    body = json.dumps(item['body']).encode('utf-8') if item.get('body') is not None else b''
+    environ = dict(request.META)
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    })
+    sub_request = WSGIRequest(environ)
+    sub_request.user = getattr(request._request, 'user', None)  # pylint: disable=protected-access
+    # CSRF was already checked for the batch request itself
+    sub_request._dont_enforce_csrf_checks = True  # pylint: disable=protected-access
+
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    if hasattr(response, 'data'):
+        return response.status_code, response.data
+    if getattr(response, 'streaming', False):
+        # The body isn't part of the batch, the file or storage stream behind it is released. The
+        # request_finished signal of close() would close the connection the batch is still using
+        with skip_signal(request_finished, receiver=close_old_connections):
+            response.close()
+        return response.status_code, None
+    return response.status_code, response.content.decode(response.charset or 'utf-8')
+
+
+def dispatch_batch_item(request, item, views_module):
+    """
+    Dispatch one sub-request of a batch on the thread and database connection of the batch
+    request, in a savepoint so that a failing item only rolls back its own writes. An unexpected
+    error is a 500 for that item instead of failing the batch.
+
+    :return: the status code and the data of the response
+    """
+    try:
+        with transaction.atomic():
+            return _dispatch_batch_request(request, item, views_module)
+    except Exception:  # pylint: disable=broad-except
+        log.exception('Batch sub-request %r failed', item.get('path') if isinstance(item, dict) else item)
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, {'detail': 'Internal server error'}
+
+
+class BufferedEventEmitter:
+    """
+    Collects tracking events raised during a bulk operation and emits them
+    in batches once the surrounding transaction has been committed.
+
+    Events are emitted in the order they were added. When `background` is
+    enabled the batches are handed to a single worker thread, so ordering
+    within one emitter is still preserved.
+    """
+
+    def __init__(self, batch_size=None, background=None):
+        self.batch_size = batch_size or getattr(settings, 'PROJECTS_TRACKING_BATCH_SIZE', TRACKING_BATCH_SIZE)
+        if background is None:
+            background = getattr(settings, 'PROJECTS_TRACKING_BACKGROUND_FLUSH', False)
+        self.background = background
+        self.events = []
+        self.emitted = 0
+        self.dropped = 0
+        self.thread = None
+
+    def add(self, name, data):
+        """
+        Buffer an event until the next flush.
+        """
+        self.events.append((name, data))
+
+    def flush_on_commit(self):
+        """
+        Flush buffered events after the current transaction commits.
+        """
+        transaction.on_commit(self.flush)
+
+    def discard(self):
+        """
+        Drop buffered events, e.g. when the surrounding transaction was rolled back.
+        """
+        self.dropped += len(self.events)
+        self.events = []
+
+    def flush(self):
+        """
+        Emit all buffered events, either inline or on a background thread.
+        """
+        events, self.events = self.events, []
+        if not events:
+            return
+        if self.background:
+            # the tracker context lives in thread-local storage, so carry it over to the worker
+            context = tracker.get_tracker().resolve_context()
+            self.thread = threading.Thread(target=self._emit, args=(events, context), daemon=True)
+            self.thread.start()
+        else:
+            self._emit(events)
+
+    def _emit(self, events, context=None):
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            if context is None:
+                self._emit_batch(batch)
+            else:
+                with tracker.get_tracker().context('edx_solutions_projects.bulk', context):
+                    self._emit_batch(batch)
+        log.info('Emitted %d tracking events, dropped %d', self.emitted, self.dropped)
+
+    def _emit_batch(self, batch):
+        for name, data in batch:
+            try:
+                tracker.emit(name, data)
+            except Exception:  # pylint: disable=broad-except
+                self.dropped += 1
+                log.exception('Failed to emit tracking event %s', name)
+            else:
+                self.emitted += 1
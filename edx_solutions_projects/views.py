@@ -2,49 +2,180 @@
 # pylint: disable=W0613
 
 """ WORKGROUPS API VIEWS """
+import hashlib
+import io
 import re
+import tempfile
+from datetime import timedelta
+from urllib.parse import urlencode
 
 from lms.djangoapps.courseware.courses import get_course
+from django.conf import settings
 from django.contrib.auth.models import Group, User
+from django.core import signing
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.db.models.signals import post_delete, pre_delete
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.decorators import method_decorator
 from edx_solutions_api_integration.courseware_access import get_course_key
 from edx_solutions_api_integration.permissions import SecureModelViewSet
 from edx_solutions_projects.receivers import (delete_empty_workgroup,
                                               reassign_or_delete_submissions)
-from eventtracking import tracker
 from lms.djangoapps.courseware import courses
 from lms.djangoapps.grades.signals.signals import SCORE_PUBLISHED
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import (
-    add_cohort, add_user_to_cohort, get_cohort_by_name,
-    remove_user_from_cohort)
+    add_cohort, add_user_to_cohort, remove_user_from_cohort)
 from openedx.core.djangoapps.course_groups.models import (CohortMembership,
                                                           CourseCohort,
                                                           CourseUserGroup)
 from rest_framework import status
 from rest_framework.decorators import detail_route, list_route
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from student.models import CourseEnrollment, AnonymousUserId
 from student.roles import CourseAccessRole, CourseAssistantRole
 from xmodule.modulestore.django import modulestore
 
-from .models import (Project, Workgroup, WorkgroupPeerReview, WorkgroupReview,
-                     WorkgroupSubmission, WorkgroupSubmissionReview,
-                     WorkgroupUser)
-from .serializers import (GroupSerializer, ProjectSerializer, UserSerializer,
+from .models import (CHANGE_FEED_TYPES, SHA1_RE, SUBMISSIONS_STORAGE_PREFIX, USER_WORKGROUPS_CACHE, WORKGROUP_CACHE,
+                     ChangeTombstone, Project, SubmissionBlob, Workgroup, WorkgroupPeerReview, WorkgroupReview,
+                     WorkgroupSubmission, WorkgroupSubmissionReview, WorkgroupUser, get_review_stats,
+                     get_workgroup_payloads)
+from .renderers import CSVRenderer, NDJSONRenderer, csv_lines, ndjson_lines
+from .serializers import (BasicWorkgroupSerializer, GroupSerializer,
+                          ProjectSerializer, UserSerializer,
                           WorkgroupDetailsSerializer,
                           WorkgroupPeerReviewSerializer,
                           WorkgroupReviewSerializer, WorkgroupSerializer,
                           WorkgroupSubmissionReviewSerializer,
                           WorkgroupSubmissionSerializer,
                           WorkgroupSubmissionBaseSerializer)
-from .utils import skip_signal
+from .utils import (MAX_UPLOAD_SIZE, STREAM_CHUNK_SIZE, BufferedEventEmitter, bump_cache_version_on_commit,
+                    dispatch_batch_item, get_storage_url, make_presigned_s3_upload, make_upload_token,
+                    read_download_token, read_upload_token, serve_storage_file, skip_signal, stream_zip,
+                    uses_s3_storage)
+
+EXPORT_CHUNK_SIZE = 1000
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+EXPORT_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [CSVRenderer, NDJSONRenderer]
+CHANGE_FEED_PAGE_SIZE = 500
+CHANGE_FEED_TOKEN_SALT = 'edx_solutions_projects.changes'
+CHANGE_FEED_TOMBSTONES = 'deleted'
+CHANGE_FEED_DELETES_READ = 'deletes_read'
+CHANGE_FEED_SAFETY_LAG = 120  # seconds
+# Workgroup lookup and serializer of the models reported by the change feed
+CHANGE_FEED_MODELS = {
+    WorkgroupSubmission: ('workgroup', WorkgroupSubmissionSerializer),
+    WorkgroupReview: ('workgroup', WorkgroupReviewSerializer),
+    WorkgroupSubmissionReview: ('submission__workgroup', WorkgroupSubmissionReviewSerializer),
+    WorkgroupPeerReview: ('workgroup', WorkgroupPeerReviewSerializer),
+}
+BATCH_MAX_REQUESTS = 50
+WORKGROUP_REVIEW_EXPORT_FIELDS = [
+    'id', 'created', 'modified', 'question', 'answer', 'workgroup', 'workgroup_name',
+    'reviewer', 'reviewer_email', 'content_id',
+]
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor based pagination on the primary key, so that deep pages cost the same as the first one.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_id(value):
+    parsed = _to_int(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def _parse_ids(value):
+    return [_parse_id(item) for item in value.split(',')]
+
+
+def _parse_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+MODIFIED_LIST_FILTERS = {
+    'modified_after': ('modified__gt', _parse_datetime),
+    'modified_before': ('modified__lt', _parse_datetime),
+}
+
+
+REVIEW_LIST_FILTERS = dict(
+    MODIFIED_LIST_FILTERS,
+    reviewer=('reviewer', str),
+    reviewer_user=('reviewer_user', _parse_id),
+    content_id=('content_id', str),
+)
+
+
+class ListFiltersMixin:
+    """
+    Lists are filtered by the query parameters of `list_filters`, which map each
+    parameter to an indexed lookup and a parser. At least one filter is required,
+    so that a list never scans the whole table, and pages are keyset based.
+    """
+    list_filters = {}
+    pagination_class = KeysetPagination
+
+    def get_list_filters(self):
+        """
+        :return: the queryset filters of the request
+        :raises ValueError: if a filter value is invalid
+        """
+        filters = {}
+        for param, (lookup, parse) in self.list_filters.items():
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    filters[lookup] = parse(value)
+                except ValueError:
+                    raise ValueError('Invalid value for "{}": {}'.format(param, value))
+        return filters
+
+    def list(self, request, *args, **kwargs):
+        try:
+            filters = self.get_list_filters()
+        except ValueError as error:
+            return Response({'detail': str(error)}, status.HTTP_400_BAD_REQUEST)
+        if not filters:
+            message = 'At least one of these filters is required: {}'.format(', '.join(sorted(self.list_filters)))
+            return Response({'detail': message}, status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.filter(**self.get_list_filters())
+        return queryset
 
 
 class GroupViewSet(SecureModelViewSet):
@@ -68,7 +199,7 @@ class WorkgroupsViewSet(SecureModelViewSet):
     Django Rest Framework ViewSet for the Workgroup model.
     """
     serializer_class = WorkgroupSerializer
-    queryset = Workgroup.objects.prefetch_related(
+    queryset = Workgroup.objects.select_related("project", "cohort").prefetch_related(
         "submissions", "workgroup_reviews", "peer_reviews",
         "groups", "users", "groups__groupprofile"
     ).all()
@@ -86,19 +217,33 @@ class WorkgroupsViewSet(SecureModelViewSet):
             # create the workgroup cohort
             workgroup = get_object_or_404(self.queryset, pk=response.data['id'])
             course_key = get_course_key(workgroup.project.course_id)
-            add_cohort(course_key, workgroup.cohort_name, assignment_type)
+            workgroup.cohort = add_cohort(course_key, workgroup.cohort_name, assignment_type)
+            workgroup.save()
 
         return response
 
+    def retrieve(self, request, pk):
+        """
+        View a Workgroup, from the cache of Workgroup payloads when it didn't change since it was cached
+        """
+        workgroup_id = _to_int(pk)
+        if workgroup_id is None:
+            raise Http404
+        # The permissions are checked on the bare Workgroup, cached payloads included
+        self.check_object_permissions(request, get_object_or_404(Workgroup, pk=workgroup_id))
+        payloads = get_workgroup_payloads(request, [workgroup_id], self.get_serializer_class(), self.get_queryset())
+        if workgroup_id not in payloads:
+            raise Http404
+        return Response(payloads[workgroup_id], status=status.HTTP_200_OK)
+
     def destroy(self, request, pk):
         """
         Delete a workgroup and its cohort.
         """
         work_group = self.get_object()
-        course_key = get_course_key(work_group.project.course_id)
-        cohort = get_cohort_by_name(course_key, work_group.cohort_name)
+        cohort = work_group.cohort
         response = super().destroy(request, pk)
-        if response.status_code == status.HTTP_204_NO_CONTENT:
+        if response.status_code == status.HTTP_204_NO_CONTENT and cohort is not None:
             cohort.delete()
         return response
 
@@ -166,19 +311,19 @@ class WorkgroupsViewSet(SecureModelViewSet):
 
             # add user to the workgroup cohort, create it if it doesn't exist (for cases where there is a legacy
             # workgroup)
-            course_key = get_course_key(workgroup.project.course_id)
-            try:
-                cohort = get_cohort_by_name(course_key, workgroup.cohort_name)
-                add_user_to_cohort(cohort, user.username)
-            except ObjectDoesNotExist:
+            if workgroup.cohort is not None:
+                add_user_to_cohort(workgroup.cohort, user.username)
+            else:
                 # This use case handles cases where a workgroup might have been created before
                 # the notion of a cohorted discussion. So we need to backfill in the data
                 assignment_type = request.data.get('assignment_type', CourseCohort.RANDOM)
                 if assignment_type not in list(dict(CourseCohort.ASSIGNMENT_TYPE_CHOICES).keys()):
                     message = "Not a valid assignment type, '{}'".format(assignment_type)
                     return Response({"detail": message}, status.HTTP_400_BAD_REQUEST)
-                workgroup = self.get_object()
+                course_key = get_course_key(workgroup.project.course_id)
                 cohort = add_cohort(course_key, workgroup.cohort_name, assignment_type)
+                workgroup.cohort = cohort
+                workgroup.save()
                 for workgroup_user in workgroup.users.all():
                     add_user_to_cohort(cohort, workgroup_user.username)
             return Response({}, status=status.HTTP_201_CREATED)
@@ -190,10 +335,10 @@ class WorkgroupsViewSet(SecureModelViewSet):
                 message = 'User {} does not exist'.format(user_id)
                 return Response({"detail": message}, status.HTTP_400_BAD_REQUEST)
             workgroup = self.get_object()
-            course_key = get_course_key(workgroup.project.course_id)
-            cohort = get_cohort_by_name(course_key, workgroup.cohort_name)
+            cohort = workgroup.cohort
             workgroup.remove_user(user)
-            remove_user_from_cohort(cohort, user.username)
+            if cohort is not None:
+                remove_user_from_cohort(cohort, user.username)
             return Response({}, status=status.HTTP_204_NO_CONTENT)
 
     @detail_route(methods=['get'])
@@ -201,7 +346,7 @@ class WorkgroupsViewSet(SecureModelViewSet):
         """
         View Peer Reviews for a specific Workgroup
         """
-        peer_reviews = WorkgroupPeerReview.objects.filter(workgroup=pk)
+        peer_reviews = WorkgroupPeerReview.objects.filter(workgroup=pk).select_related('question_ref')
         content_id = self.request.query_params.get('content_id', None)
         if content_id is not None:
             peer_reviews = peer_reviews.filter(content_id=content_id)
@@ -231,7 +376,7 @@ class WorkgroupsViewSet(SecureModelViewSet):
         """
         View Workgroup Reviews for a specific Workgroup
         """
-        workgroup_reviews = WorkgroupReview.objects.filter(workgroup=pk)
+        workgroup_reviews = WorkgroupReview.objects.filter(workgroup=pk).select_related('question_ref')
         content_id = self.request.query_params.get('content_id', None)
         if content_id is not None:
             workgroup_reviews = workgroup_reviews.filter(content_id=content_id)
@@ -243,6 +388,65 @@ class WorkgroupsViewSet(SecureModelViewSet):
                 response_data.append(serializer.data)  # pylint: disable=E1101
         return Response(response_data, status=status.HTTP_200_OK)
 
+    @list_route(methods=['get'])
+    def lookup(self, request):
+        """
+        The Workgroups of a user in a course, `?user_id=&course_id=`, optionally only the one of
+        the Project of `content_id`
+        """
+        user_id = _to_int(request.query_params.get('user_id'))
+        course_id = request.query_params.get('course_id')
+        if user_id is None or not course_id:
+            message = 'Query strings for "user_id" and "course_id" are required.'
+            return Response({'detail': message}, status=status.HTTP_400_BAD_REQUEST)
+        workgroups = Workgroup.get_user_workgroups(user_id, course_id, request.query_params.get('content_id'))
+        return Response(workgroups, status=status.HTTP_200_OK)
+
+    @detail_route(methods=['get'])
+    def context(self, request, pk):
+        """
+        Everything the Group Project XBlock renders for a Workgroup in one response: the
+        Workgroup, its users and submissions, and its workgroup and peer reviews, optionally
+        filtered by `content_id`. The number of queries doesn't depend on the Workgroup size.
+        """
+        content_id = request.query_params.get('content_id')
+        workgroup_reviews = WorkgroupReview.objects.select_related('question_ref')
+        peer_reviews = WorkgroupPeerReview.objects.select_related('question_ref')
+        if content_id is not None:
+            workgroup_reviews = workgroup_reviews.filter(content_id=content_id)
+            peer_reviews = peer_reviews.filter(content_id=content_id)
+        workgroup = get_object_or_404(
+            Workgroup.objects.prefetch_related(
+                'users',
+                Prefetch('submissions', queryset=WorkgroupSubmission.objects.prefetch_related('reviews')),
+                Prefetch('workgroup_reviews', queryset=workgroup_reviews, to_attr='context_workgroup_reviews'),
+                Prefetch('peer_reviews', queryset=peer_reviews, to_attr='context_peer_reviews'),
+            ),
+            pk=pk,
+        )
+
+        context = {'request': request}
+        return Response({
+            'workgroup': BasicWorkgroupSerializer(workgroup, context=context).data,
+            'users': UserSerializer(workgroup.users.all(), many=True, context=context).data,
+            'submissions': WorkgroupSubmissionSerializer(workgroup.submissions.all(), many=True, context=context).data,
+            'workgroup_reviews': WorkgroupReviewSerializer(
+                workgroup.context_workgroup_reviews, many=True, context=context
+            ).data,
+            'peer_reviews': WorkgroupPeerReviewSerializer(
+                workgroup.context_peer_reviews, many=True, context=context
+            ).data,
+        }, status=status.HTTP_200_OK)
+
+    @detail_route(methods=['get'])
+    def review_stats(self, request, pk):
+        """
+        Per question stats of the Workgroup and Submission Reviews of a specific Workgroup
+        """
+        workgroup = get_object_or_404(Workgroup.objects.only('id', 'project_id'), pk=pk)
+        stats = get_review_stats(workgroup.project_id, workgroup.id, request.query_params.get('content_id'))
+        return Response(stats, status=status.HTTP_200_OK)
+
     @detail_route(methods=['get'])
     def score(self, request, pk):
         """
@@ -363,25 +567,294 @@ class ProjectsViewSet(SecureModelViewSet):
 
         return queryset
 
-    @detail_route(methods=['get'])
+    @detail_route(methods=['get'], renderer_classes=EXPORT_RENDERER_CLASSES)
     def workgroup_reviews(self, request, pk):
         """
         View Workgroup Reviews for a specific Workgroup
+
+        With `?format=csv` or `?format=ndjson` the reviews are streamed in chunks instead.
         """
-        workgroup_reviews = WorkgroupReview.objects.filter(workgroup__project=pk)
+        export_format = request.accepted_renderer.format
+        if export_format in (CSVRenderer.format, NDJSONRenderer.format):
+            rows = self._iter_workgroup_review_rows(pk)
+            if export_format == CSVRenderer.format:
+                lines = csv_lines(WORKGROUP_REVIEW_EXPORT_FIELDS, rows)
+            else:
+                lines = ndjson_lines(rows)
+            response = StreamingHttpResponse(lines, content_type=request.accepted_renderer.media_type)
+            response['Content-Disposition'] = 'attachment; filename="project_{}_workgroup_reviews.{}"'.format(
+                pk, export_format
+            )
+            return response
+
+        workgroup_reviews = WorkgroupReview.objects.filter(
+            workgroup__project=pk
+        ).select_related('workgroup', 'reviewer_user', 'question_ref')
         serializer = WorkgroupReviewSerializer(workgroup_reviews, context={'request': request}, many=True)
         reviews = serializer.data
-        users = dict(AnonymousUserId.objects.filter(
-            anonymous_user_id__in=[w.reviewer for w in workgroup_reviews]
-        ).values_list('anonymous_user_id', 'user__email'))
-        groups = dict(Workgroup.objects.filter(
-            id__in=[w.workgroup_id for w in workgroup_reviews]
-        ).values_list('id', 'name'))
-        for review in reviews:
-            review['reviewer_email'] = users.get(review['reviewer'], review['reviewer'])
-            review['workgroup_name'] = groups.get(review['workgroup'], review['workgroup'])
+        unresolved_emails = self._get_unresolved_reviewer_emails(
+            w.reviewer for w in workgroup_reviews if w.reviewer_user is None
+        )
+        for review, workgroup_review in zip(reviews, workgroup_reviews):
+            if workgroup_review.reviewer_user is not None:
+                review['reviewer_email'] = workgroup_review.reviewer_user.email
+            else:
+                review['reviewer_email'] = unresolved_emails.get(review['reviewer'], review['reviewer'])
+            review['workgroup_name'] = workgroup_review.workgroup.name
         return Response(reviews, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _get_unresolved_reviewer_emails(reviewers):
+        """
+        Look up the emails of the reviewers that have no `reviewer_user` yet, e.g. before the backfill.
+        """
+        reviewers = set(reviewers)
+        if not reviewers:
+            return {}
+        return dict(AnonymousUserId.objects.filter(
+            anonymous_user_id__in=reviewers
+        ).values_list('anonymous_user_id', 'user__email'))
+
+    def _iter_workgroup_review_rows(self, project_id):
+        """
+        Yield the Workgroup Reviews of a Project in keyset chunks, with the reviewer emails
+        and workgroup names joined in the same query.
+        """
+        workgroup_reviews = WorkgroupReview.objects.filter(workgroup__project=project_id).order_by('id')
+        last_id = 0
+        while True:
+            chunk = list(workgroup_reviews.filter(id__gt=last_id).values(
+                'id', 'created', 'modified', 'answer', 'workgroup', 'reviewer', 'content_id',
+                question=F('question_ref__text'), reviewer_email=F('reviewer_user__email'),
+                workgroup_name=F('workgroup__name'),
+            )[:EXPORT_CHUNK_SIZE])
+            if not chunk:
+                break
+            last_id = chunk[-1]['id']
+            unresolved_emails = self._get_unresolved_reviewer_emails(
+                review['reviewer'] for review in chunk if review['reviewer_email'] is None
+            )
+            for review in chunk:
+                if review['reviewer_email'] is None:
+                    review['reviewer_email'] = unresolved_emails.get(review['reviewer'], review['reviewer'])
+                yield review
+
+    @list_route(methods=['post'])
+    def batch(self, request):
+        """
+        Dispatch a list of sub-requests to the routes of this API in one round-trip, e.g.
+        `{"requests": [{"method": "GET", "path": "/api/server/workgroups/1/"}, ...]}`, and
+        return the status and data of each, in order.
+
+        The sub-requests run in order on the thread and database connection of the batch request,
+        so that they see the earlier writes of the batch even inside its transaction.
+        """
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        max_requests = getattr(settings, 'PROJECTS_BATCH_MAX_REQUESTS', BATCH_MAX_REQUESTS)
+        if not isinstance(items, list) or not items or len(items) > max_requests:
+            message = '"requests" should be a list of 1 to {} requests'.format(max_requests)
+            return Response({'detail': message}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Only the viewsets of this module can be batched
+        results = [dispatch_batch_item(request, item, __name__) for item in items]
+        return Response({
+            'responses': [{'status': status_code, 'body': body} for status_code, body in results],
+        }, status=status.HTTP_200_OK)
+
+    @list_route(methods=['get'])
+    def changes(self, request):
+        """
+        Incremental feed of the submissions and reviews of a Project (`project_id`) or of a
+        course (`course_id`) changed or deleted since the previous call, oldest first.
+
+        The first call starts from `since`, or from the beginning; the following calls pass
+        the `cursor` of the previous response, until `has_more` is false. Deletes are kept for
+        PROJECTS_CHANGE_TOMBSTONE_RETENTION_DAYS, cursors which didn't catch up with the deletes
+        within that time get a 410 and have to start over.
+
+        Rows are timestamped before their transaction commits, so the feed only goes up to
+        PROJECTS_CHANGE_FEED_SAFETY_LAG seconds ago: a row committed late with an older timestamp
+        would otherwise be behind cursors that already moved past it.
+        """
+        project_id = _to_int(request.query_params.get('project_id'))
+        course_id = request.query_params.get('course_id')
+        if (project_id is None) == (not course_id):
+            message = 'Exactly one of "project_id" and "course_id" is required'
+            return Response({'detail': message}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = min(_to_int(request.query_params.get('page_size')) or CHANGE_FEED_PAGE_SIZE, CHANGE_FEED_PAGE_SIZE)
+
+        cursor = request.query_params.get('cursor')
+        since = request.query_params.get('since')
+        try:
+            if cursor:
+                positions = signing.loads(cursor, salt=CHANGE_FEED_TOKEN_SALT)
+            elif since:
+                since = _parse_datetime(since).isoformat()
+                positions = {source: [since, 0] for source in CHANGE_FEED_TYPES.values()}
+                positions[CHANGE_FEED_TOMBSTONES] = [since, 0]
+                positions[CHANGE_FEED_DELETES_READ] = since
+            else:
+                positions = {}
+        except (signing.BadSignature, ValueError):
+            return Response({'detail': 'Invalid cursor or "since"'}, status=status.HTTP_400_BAD_REQUEST)
+        # Time until which the reader got every delete, deletes are only reported until they are pruned
+        deletes_read = positions.get(CHANGE_FEED_DELETES_READ)
+        if deletes_read and parse_datetime(deletes_read) < ChangeTombstone.objects.get_retention_horizon():
+            message = 'Deletes since the cursor were pruned, restart the feed from the beginning'
+            return Response({'detail': message}, status=status.HTTP_410_GONE)
+
+        if project_id is not None:
+            workgroup_field, value = 'project_id', project_id
+        else:
+            workgroup_field, value = 'project__course_id', course_id
+        sources = []
+        for model, (workgroup_lookup, __) in CHANGE_FEED_MODELS.items():
+            queryset = model.objects.filter(**{'{}__{}'.format(workgroup_lookup, workgroup_field): value})
+            if model is not WorkgroupSubmission:
+                queryset = queryset.select_related('question_ref')
+            sources.append((CHANGE_FEED_TYPES[model], queryset, 'modified'))
+        if project_id is not None:
+            tombstones = ChangeTombstone.objects.filter(project_id=project_id)
+        else:
+            tombstones = ChangeTombstone.objects.filter(course_id=course_id)
+        sources.append((CHANGE_FEED_TOMBSTONES, tombstones, 'deleted'))
+
+        # Every source is read in (timestamp, id) order after its own position, and the
+        # rows are merged so that each source only advances by the rows returned
+        safety_lag = getattr(settings, 'PROJECTS_CHANGE_FEED_SAFETY_LAG', CHANGE_FEED_SAFETY_LAG)
+        until = timezone.now() - timedelta(seconds=safety_lag)
+        candidates, has_more = [], False
+        for source, queryset, timestamp_field in sources:
+            queryset = queryset.filter(**{'{}__lte'.format(timestamp_field): until})
+            position = positions.get(source)
+            if position:
+                timestamp = parse_datetime(position[0])
+                queryset = queryset.filter(
+                    Q(**{'{}__gt'.format(timestamp_field): timestamp}) |
+                    Q(**{timestamp_field: timestamp, 'id__gt': position[1]})
+                )
+            rows = list(queryset.order_by(timestamp_field, 'id')[:page_size])
+            has_more = has_more or len(rows) == page_size
+            candidates += [(getattr(row, timestamp_field), source, row.id, row) for row in rows]
+        candidates.sort(key=lambda candidate: candidate[:3])
+        has_more = has_more or len(candidates) > page_size
+
+        changes, deleted = [], []
+        for timestamp, source, row_id, row in candidates[:page_size]:
+            positions[source] = [timestamp.isoformat(), row_id]
+            if source == CHANGE_FEED_TOMBSTONES:
+                deleted.append({'type': row.object_type, 'id': row.object_id, 'deleted': row.deleted})
+            else:
+                serializer_class = CHANGE_FEED_MODELS[type(row)][1]
+                changes.append({'type': source, 'data': serializer_class(row, context={'request': request}).data})
+        if not has_more:
+            positions[CHANGE_FEED_DELETES_READ] = until.isoformat()
+        return Response({
+            'changes': changes,
+            'deleted': deleted,
+            'cursor': signing.dumps(positions, salt=CHANGE_FEED_TOKEN_SALT),
+            'has_more': has_more,
+        }, status=status.HTTP_200_OK)
+
+    @detail_route(methods=['get'])
+    def review_stats(self, request, pk):
+        """
+        Per question stats of the Workgroup and Submission Reviews of a Project
+        """
+        project = get_object_or_404(Project.objects.only('id'), pk=pk)
+        return Response(get_review_stats(project.id, content_id=request.query_params.get('content_id')),
+                        status=status.HTTP_200_OK)
+
+    @detail_route(methods=['get'])
+    def peer_review_matrix(self, request, pk):
+        """
+        Peer review completion of the workgroups of a Project: for every workgroup, the number
+        of questions answered by each member about each other member, per content_id.
+
+        `answered[c][i][j]` is the count for `content_ids[c]`, reviewer `users[i]` and
+        reviewee `users[j]` of the workgroup.
+        """
+        project = self.get_object()
+        members = WorkgroupUser.objects.filter(
+            workgroup__project=project
+        ).order_by('workgroup_id', 'user_id').values_list('workgroup_id', 'user_id')
+        # Reviews stored before reviewer_user, and not backfilled yet, are resolved from their AnonymousUserId
+        anonymous_user_ids = AnonymousUserId.objects.filter(anonymous_user_id=OuterRef('reviewer'))
+        answered = WorkgroupPeerReview.objects.filter(workgroup__project=project).annotate(
+            reviewer_id=Coalesce('reviewer_user_id', Subquery(anonymous_user_ids.values('user_id')[:1])),
+        ).filter(reviewer_id__isnull=False).order_by().values(
+            'workgroup_id', 'content_id', 'reviewer_id', 'user_id'
+        ).annotate(
+            questions=Count('question_ref', distinct=True)
+        ).values_list('workgroup_id', 'content_id', 'reviewer_id', 'user_id', 'questions')
+
+        workgroup_users = {}
+        for workgroup_id, user_id in members:
+            workgroup_users.setdefault(workgroup_id, []).append(user_id)
+        answered = list(answered)
+        content_ids = sorted({content_id for __, content_id, __, __, __ in answered}, key=lambda value: value or '')
+        content_indexes = {content_id: index for index, content_id in enumerate(content_ids)}
+
+        matrices = {
+            workgroup_id: [[[0] * len(users) for __ in users] for __ in content_ids]
+            for workgroup_id, users in workgroup_users.items()
+        }
+        user_indexes = {
+            workgroup_id: {user_id: index for index, user_id in enumerate(users)}
+            for workgroup_id, users in workgroup_users.items()
+        }
+        for workgroup_id, content_id, reviewer_id, reviewee_id, questions in answered:
+            indexes = user_indexes.get(workgroup_id, {})
+            # Reviews by or about users who left the workgroup are not part of the matrix
+            if reviewer_id in indexes and reviewee_id in indexes:
+                matrix = matrices[workgroup_id][content_indexes[content_id]]
+                matrix[indexes[reviewer_id]][indexes[reviewee_id]] = questions
+
+        return Response({
+            'content_ids': content_ids,
+            'workgroups': [
+                {'id': workgroup_id, 'users': users, 'answered': matrices[workgroup_id]}
+                for workgroup_id, users in workgroup_users.items()
+            ],
+        }, status=status.HTTP_200_OK)
+
+    @detail_route(methods=['get'])
+    def submissions_archive(self, request, pk):
+        """
+        Download the submissions of all the workgroups of a Project as a ZIP archive,
+        with a folder per workgroup. The archive is streamed as it is built.
+        """
+        project = self.get_object()
+        response = StreamingHttpResponse(
+            stream_zip(self._submissions_archive_entries(project)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="project_{}_submissions.zip"'.format(project.id)
+        return response
+
+    def _submissions_archive_entries(self, project):
+        submissions = WorkgroupSubmission.objects.filter(
+            workgroup__project=project
+        ).order_by('workgroup_id', 'id').values_list(
+            'workgroup_id', 'workgroup__name', 'document_filename', 'storage_key'
+        )
+
+        current_workgroup_id, arcnames = None, set()
+        for workgroup_id, workgroup_name, filename, storage_key in submissions.iterator():
+            if not storage_key:
+                continue
+            if workgroup_id != current_workgroup_id:
+                current_workgroup_id, arcnames = workgroup_id, set()
+            folder = (workgroup_name or 'Workgroup {}'.format(workgroup_id)).replace('/', '_')
+            filename = (filename or storage_key.rsplit('/', 1)[-1]).replace('/', '_')
+            arcname = '{}/{}'.format(folder, filename)
+            suffix = 1
+            while arcname in arcnames:
+                suffix += 1
+                arcname = '{}/({}) {}'.format(folder, suffix, filename)
+            arcnames.add(arcname)
+            yield arcname, storage_key
+
     @detail_route(methods=['get', 'post'])
     def workgroups(self, request, pk):
         """
@@ -393,11 +866,9 @@ class ProjectsViewSet(SecureModelViewSet):
             if 'details' in request.query_params:
                 serializer_cls = WorkgroupDetailsSerializer
                 workgroups = workgroups.prefetch_related('submissions', 'users', 'users__organizations')
-            response_data = []
-            if workgroups:
-                for workgroup in workgroups:
-                    serializer = serializer_cls(workgroup, context={'request': request})
-                    response_data.append(serializer.data)  # pylint: disable=E1101
+            workgroup_ids = list(workgroups.values_list('id', flat=True))
+            payloads = get_workgroup_payloads(request, workgroup_ids, serializer_cls, workgroups)
+            response_data = [payloads[workgroup_id] for workgroup_id in workgroup_ids if workgroup_id in payloads]
             return Response(response_data, status=status.HTTP_200_OK)
         else:
             workgroup_id = request.data.get('id')
@@ -409,6 +880,11 @@ class ProjectsViewSet(SecureModelViewSet):
             project = self.get_object()
             project.workgroups.add(workgroup)
             project.save()
+            # Adding to a reverse foreign key is a queryset update, without signals
+            bump_cache_version_on_commit(WORKGROUP_CACHE, [workgroup.id])
+            bump_cache_version_on_commit(USER_WORKGROUPS_CACHE, list(
+                WorkgroupUser.objects.filter(workgroup=workgroup).values_list('user_id', flat=True)
+            ))
             return Response({}, status=status.HTTP_201_CREATED)
 
     @detail_route(methods=['post'])
@@ -483,9 +959,18 @@ class ProjectsViewSet(SecureModelViewSet):
 
         # Delete and recreate cohort groups and memberships
         workgroups = self._get_workgroups()
-        memberships, user_group = self._get_course_membership_and_groups(workgroups)
+        memberships = self._get_course_memberships()
         self._delete_cohort_groups_and_users(memberships)
-        self._create_cohort_groups_and_memberships(workgroups, user_group, memberships)
+
+        # Tracking events are only emitted once the new memberships are committed
+        events = BufferedEventEmitter()
+        try:
+            with transaction.atomic():
+                self._create_cohort_groups_and_memberships(workgroups, memberships, events)
+                events.flush_on_commit()
+        except Exception:
+            events.discard()
+            raise
         return Response({}, status=status.HTTP_201_CREATED)
 
     def _create_new_workgroups(self):
@@ -500,9 +985,9 @@ class ProjectsViewSet(SecureModelViewSet):
             Workgroup.objects.bulk_create(new_workgroups)
 
         all_workgroups = self._get_workgroups()
-        self._add_workgroups_to_cohorts(all_workgroups, workgroups)
+        self._add_workgroups_to_cohorts(all_workgroups)
 
-    def _create_cohort_groups_and_memberships(self, workgroups, user_group, memberships):
+    def _create_cohort_groups_and_memberships(self, workgroups, memberships, events):
         GroupUserModel = CourseUserGroup.users.through._meta.model
         new_workgroup_users = []
         new_cohort_memberships = []
@@ -513,7 +998,7 @@ class ProjectsViewSet(SecureModelViewSet):
                 wg = workgroups[group]
                 workgroup_id = wg['id']
                 cohort_name = wg['cohort_name']
-                user_group_id = user_group[cohort_name]
+                user_group_id = wg['cohort_id']
                 new_workgroup_users += [WorkgroupUser(workgroup_id=workgroup_id, user_id=user_id)]
                 new_cohort_memberships += [CohortMembership(
                     course_user_group_id=user_group_id,
@@ -523,7 +1008,7 @@ class ProjectsViewSet(SecureModelViewSet):
                 new_cohort_group_users += [GroupUserModel(courseusergroup_id=user_group_id, user_id=user_id)]
 
                 membership = memberships.get(user_id, {})
-                tracker.emit(
+                events.add(
                     "edx.cohort.user_add_requested",
                     {
                         "user_id": user_id,
@@ -536,31 +1021,43 @@ class ProjectsViewSet(SecureModelViewSet):
 
         if new_workgroup_users:
             WorkgroupUser.objects.bulk_create(new_workgroup_users)
+            # Bulk created without post_save signals, and only once they are committed, so that no
+            # membership read in between stays cached
+            bump_cache_version_on_commit(USER_WORKGROUPS_CACHE, self.user_ids)
+            bump_cache_version_on_commit(WORKGROUP_CACHE, {
+                workgroup_user.workgroup_id for workgroup_user in new_workgroup_users
+            })
         if new_cohort_memberships:
             CohortMembership.objects.bulk_create(new_cohort_memberships)
         if new_cohort_group_users:
             GroupUserModel.objects.bulk_create(new_cohort_group_users)
 
-    def _add_workgroups_to_cohorts(self, all_workgroups, workgroups):
+    def _add_workgroups_to_cohorts(self, all_workgroups):
         course = courses.get_course_by_id(self.course_key)
         course_id = course.id
-        cohorts = [w['cohort_name'] for w in all_workgroups.values()if w['name'] not in workgroups]
+        # New workgroups, and existing ones whose cohort was never linked, e.g. missed by the backfill
+        unlinked_workgroups = [w for w in all_workgroups.values() if w['cohort_id'] is None]
+        if not unlinked_workgroups:
+            return
+        cohorts = [w['cohort_name'] for w in unlinked_workgroups]
+        cohort_groups = CourseUserGroup.objects.filter(
+            name__in=cohorts,
+            course_id=course_id,
+            group_type=CourseUserGroup.COHORT
+        )
+        existing_cohorts = set(cohort_groups.values_list('name', flat=True))
+        new_cohorts = [cohort_name for cohort_name in cohorts if cohort_name not in existing_cohorts]
         objects = []
-        for cohort_name in cohorts:
+        for cohort_name in new_cohorts:
             cug = CourseUserGroup(name=cohort_name, course_id=course_id, group_type=CourseUserGroup.COHORT)
             objects += [cug]
         if objects:
             CourseUserGroup.objects.bulk_create(objects)
 
-        user_groups = CourseUserGroup.objects.filter(
-            name__in=cohorts,
-            course_id=course_id,
-            group_type=CourseUserGroup.COHORT
-        ).values_list('name', 'id')
-        user_groups = dict(user_groups)
+        user_groups = dict(cohort_groups.values_list('name', 'id'))
 
         objects = []
-        for cohort_name in cohorts:
+        for cohort_name in new_cohorts:
             course_user_group = user_groups[cohort_name]
             cc = CourseCohort(course_user_group_id=course_user_group, assignment_type=CourseCohort.RANDOM)
             objects += [cc]
@@ -568,11 +1065,16 @@ class ProjectsViewSet(SecureModelViewSet):
         if objects:
             CourseCohort.objects.bulk_create(objects)
 
+        # Link the workgroups to their cohorts so later lookups don't depend on the cohort name
+        Workgroup.objects.bulk_update([
+            Workgroup(id=w['id'], cohort_id=user_groups[w['cohort_name']]) for w in unlinked_workgroups
+        ], ['cohort'])
+
     def _get_workgroups(self):
         raw_workgroups = Workgroup.objects.filter(
             name__in=list(self.groups),
             project=self.project
-        ).values('id', 'project_id', 'name')
+        ).values('id', 'project_id', 'name', 'cohort_id')
 
         workgroups = {}
         for workgroup in raw_workgroups:
@@ -586,14 +1088,7 @@ class ProjectsViewSet(SecureModelViewSet):
 
         return workgroups
 
-    def _get_course_membership_and_groups(self, workgroups):
-        user_groups = CourseUserGroup.objects.filter(
-            course_id=self.course_key,
-            group_type=CourseUserGroup.COHORT,
-            name__in=[w['cohort_name'] for w in workgroups.values()]
-        ).values_list('id', 'name')
-        user_group = {n: i for i, n in user_groups}
-
+    def _get_course_memberships(self):
         memberships = CohortMembership.objects.filter(
             course_id=self.course_key,
             user_id__in=self.user_ids
@@ -603,7 +1098,7 @@ class ProjectsViewSet(SecureModelViewSet):
             'course_user_group__name'
         )
         memberships = {u: {'id': m, 'name': n} for u, m, n in memberships}
-        return memberships, user_group
+        return memberships
 
     def _delete_groups(self):
         with skip_signal(pre_delete, receiver=reassign_or_delete_submissions, sender=WorkgroupUser):
@@ -629,12 +1124,144 @@ class ProjectsViewSet(SecureModelViewSet):
             ).delete()
 
 
-class WorkgroupSubmissionsViewSet(SecureModelViewSet):
+class WorkgroupSubmissionsViewSet(ListFiltersMixin, SecureModelViewSet):
     """
     Django Rest Framework ViewSet for the Submission model.
     """
     serializer_class = WorkgroupSubmissionSerializer
     queryset = WorkgroupSubmission.objects.all()
+    list_filters = dict(
+        MODIFIED_LIST_FILTERS,
+        workgroup=('workgroup', _parse_id),
+        workgroups=('workgroup__in', _parse_ids),
+        project=('workgroup__project', _parse_id),
+        user=('user', _parse_id),
+    )
+
+    @list_route(methods=['post'])
+    def upload(self, request):
+        """
+        Start the upload of a Submission document straight to the storage.
+
+        Returns where to send the file, or `exists` when the workgroup already stored the
+        same content, together with the token to pass to `finalize` once the upload is done.
+        """
+        workgroup_id = request.data.get('workgroup')
+        user_id = request.data.get('user')
+        sha1 = str(request.data.get('sha1', '')).lower()
+        filename = request.data.get('document_filename')
+        mime_type = request.data.get('document_mime_type')
+        if not all((workgroup_id, user_id, filename, mime_type)) or not SHA1_RE.match(sha1) or '/' in filename:
+            message = 'workgroup, user, sha1, document_filename and document_mime_type are required'
+            return Response({'detail': message}, status=status.HTTP_400_BAD_REQUEST)
+        if not WorkgroupUser.objects.filter(workgroup_id=workgroup_id, user_id=user_id).exists():
+            message = 'User {} is not a member of workgroup {}'.format(user_id, workgroup_id)
+            return Response({'detail': message}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Uploads always go under the workgroup's own path; the content is hashed by the server
+        # before it is shared with the submissions of other workgroups
+        file_path = '{}{}/{}/{}'.format(SUBMISSIONS_STORAGE_PREFIX, workgroup_id, sha1, filename)
+        exists = default_storage.exists(file_path)
+        token = make_upload_token({
+            'workgroup': workgroup_id,
+            'user': user_id,
+            'file_path': file_path,
+            'document_id': request.data.get('document_id') or filename,
+            'document_filename': filename,
+            'document_mime_type': mime_type,
+        })
+        response_data = {'exists': exists, 'token': token}
+        if not exists:
+            max_size = getattr(settings, 'PROJECTS_MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+            if uses_s3_storage():
+                presigned_post = make_presigned_s3_upload(file_path, mime_type, max_size)
+                response_data.update(method='POST', url=presigned_post['url'], fields=presigned_post['fields'])
+            else:
+                upload_url = '{}?{}'.format(request.build_absolute_uri('../upload_file/'), urlencode({'token': token}))
+                response_data.update(method='PUT', url=upload_url, fields={})
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @list_route(methods=['put'], permission_classes=[AllowAny], authentication_classes=[])
+    def upload_file(self, request):
+        """
+        Receive the upload of a Submission document for storages that can't take uploads
+        directly, e.g. the local file system. The request body is the file content, which
+        must match the sha1 given to `upload`. Returns the token to pass to `finalize`.
+        """
+        try:
+            upload = read_upload_token(request.query_params.get('token', ''))
+        except signing.BadSignature:
+            return Response({'detail': 'Invalid or expired upload token'}, status=status.HTTP_403_FORBIDDEN)
+
+        max_size = getattr(settings, 'PROJECTS_MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+        stream = request.stream or io.BytesIO()
+        digest = hashlib.sha1()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE) as content:
+            # The bytes read are capped, chunked bodies have no Content-Length to check
+            for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_size:
+                    return Response({'detail': 'File is too large'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+                digest.update(chunk)
+                content.write(chunk)
+            if digest.hexdigest() != SubmissionBlob.sha1_for_storage_key(upload['file_path']):
+                message = 'The uploaded content does not match its sha1'
+                return Response({'detail': message}, status=status.HTTP_400_BAD_REQUEST)
+
+            file_path = upload['file_path']
+            # Keys are content addressed and the content is verified, an existing file has the same content
+            if not default_storage.exists(file_path):
+                content.seek(0)
+                file_path = default_storage.save(file_path, File(content))
+        # The storage may store the file under another name, the new token has the stored one, and
+        # vouches for its content so that finalize can share it with the submissions of other workgroups
+        token = make_upload_token(dict(upload, file_path=file_path, verified=True))
+        return Response({'token': token}, status=status.HTTP_201_CREATED)
+
+    @list_route(methods=['post'])
+    def finalize(self, request):
+        """
+        Create the Submission for a document uploaded after calling `upload`.
+        """
+        try:
+            upload = read_upload_token(request.data.get('token', ''))
+        except signing.BadSignature:
+            return Response({'detail': 'Invalid or expired upload token'}, status=status.HTTP_400_BAD_REQUEST)
+        if not default_storage.exists(upload['file_path']):
+            return Response({'detail': 'The document was not uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+
+        submission = WorkgroupSubmission(
+            workgroup_id=upload['workgroup'],
+            user_id=upload['user'],
+            document_id=upload['document_id'],
+            document_url=get_storage_url(upload['file_path']),
+            document_mime_type=upload['document_mime_type'],
+            document_filename=upload['document_filename'],
+        )
+        # Files uploaded straight to the storage are shared once verify_submission_files checked them
+        submission.save(content_verified=upload.get('verified', False))
+        serializer = self.get_serializer(submission)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @detail_route(methods=['get'], permission_classes=[AllowAny], authentication_classes=[])
+    def download(self, request, pk):
+        """
+        Download the document of a Submission kept in local storage. Access is granted by
+        the signed, time-limited token of the link generated for the submission.
+        """
+        try:
+            file_path = read_download_token(request.query_params.get('token', ''))
+        except signing.BadSignature:
+            return Response({'detail': 'Invalid or expired download token'}, status=status.HTTP_403_FORBIDDEN)
+
+        submission = get_object_or_404(WorkgroupSubmission, pk=pk, storage_key=file_path)
+        return serve_storage_file(
+            request,
+            file_path,
+            filename=submission.document_filename or file_path.rsplit('/', 1)[-1],
+            content_type=submission.document_mime_type,
+        )
 
     @list_route(methods=['post'])
     def by_workgroups_and_users(self, request):
@@ -659,25 +1286,114 @@ class WorkgroupSubmissionsViewSet(SecureModelViewSet):
         return Response(response_data, status=status.HTTP_200_OK)
 
 
-class WorkgroupReviewsViewSet(SecureModelViewSet):
+class ReviewViewSetMixin:
+    """
+    Review answers are stored with insert-or-update semantics: posting the answer of an
+    already answered question replaces the previous answer instead of adding a duplicate.
+    """
+
+    def perform_create(self, serializer):
+        model = self.queryset.model
+        serializer.instance = model.objects.upsert(model(**serializer.validated_data))
+
+    @list_route(methods=['post'])
+    def upsert(self, request):
+        """
+        Create a review, or update the answer of the review with the same target, reviewer,
+        question and content_id.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @list_route(methods=['post'])
+    def bulk(self, request):
+        """
+        Create or update a list of reviews, e.g. all the answers of a review form, in one
+        transaction. Nothing is stored unless every review is valid, otherwise the
+        response lists the errors of each review, in order.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'A list of reviews is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Related objects are checked with one query per relation instead of one per review
+        relations = {
+            name: field.queryset.model
+            for name, field in self.get_serializer().fields.items()
+            if isinstance(field, PrimaryKeyRelatedField)
+        }
+        existing_ids = {}
+        for name, model in relations.items():
+            ids = {_to_int(item.get(name)) for item in items if isinstance(item, dict)}
+            existing_ids[name] = set(model.objects.filter(pk__in=ids - {None}).values_list('pk', flat=True))
+
+        reviews, errors = [], []
+        for item in items:
+            if not isinstance(item, dict):
+                errors.append({'non_field_errors': ['Invalid data, expected a review']})
+                continue
+            serializer = self.get_serializer(data=item)
+            for name in relations:
+                del serializer.fields[name]
+            item_errors = {} if serializer.is_valid() else dict(serializer.errors)
+            related_ids = {}
+            for name in relations:
+                related_id = _to_int(item.get(name))
+                if related_id in existing_ids[name]:
+                    related_ids['{}_id'.format(name)] = related_id
+                else:
+                    item_errors[name] = ['Invalid pk "{}" - object does not exist.'.format(item.get(name))]
+            errors.append(item_errors)
+            if not item_errors:
+                reviews.append(self.queryset.model(**serializer.validated_data, **related_ids))
+
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        self.queryset.model.objects.upsert_many(reviews)
+        return Response({'count': len(reviews)}, status=status.HTTP_201_CREATED)
+
+
+class WorkgroupReviewsViewSet(ReviewViewSetMixin, ListFiltersMixin, SecureModelViewSet):
     """
     Django Rest Framework ViewSet for the ProjectReview model.
     """
     serializer_class = WorkgroupReviewSerializer
-    queryset = WorkgroupReview.objects.all()
+    queryset = WorkgroupReview.objects.select_related('question_ref')
+    list_filters = dict(
+        REVIEW_LIST_FILTERS,
+        workgroup=('workgroup', _parse_id),
+        workgroups=('workgroup__in', _parse_ids),
+        project=('workgroup__project', _parse_id),
+    )
 
 
-class WorkgroupSubmissionReviewsViewSet(SecureModelViewSet):
+class WorkgroupSubmissionReviewsViewSet(ReviewViewSetMixin, ListFiltersMixin, SecureModelViewSet):
     """
     Django Rest Framework ViewSet for the SubmissionReview model.
     """
     serializer_class = WorkgroupSubmissionReviewSerializer
-    queryset = WorkgroupSubmissionReview.objects.all()
+    queryset = WorkgroupSubmissionReview.objects.select_related('question_ref')
+    list_filters = dict(
+        REVIEW_LIST_FILTERS,
+        submission=('submission', _parse_id),
+        workgroup=('submission__workgroup', _parse_id),
+        workgroups=('submission__workgroup__in', _parse_ids),
+        project=('submission__workgroup__project', _parse_id),
+    )
 
 
-class WorkgroupPeerReviewsViewSet(SecureModelViewSet):
+class WorkgroupPeerReviewsViewSet(ReviewViewSetMixin, ListFiltersMixin, SecureModelViewSet):
     """
     Django Rest Framework ViewSet for the PeerReview model.
     """
     serializer_class = WorkgroupPeerReviewSerializer
-    queryset = WorkgroupPeerReview.objects.all()
+    queryset = WorkgroupPeerReview.objects.select_related('question_ref')
+    list_filters = dict(
+        REVIEW_LIST_FILTERS,
+        workgroup=('workgroup', _parse_id),
+        workgroups=('workgroup__in', _parse_ids),
+        project=('workgroup__project', _parse_id),
+        user=('user', _parse_id),
+    )